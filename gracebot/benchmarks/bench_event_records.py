@@ -0,0 +1,163 @@
+"""
+Compare the memory of the events when the whole superevent from the Grace database
+is kept with the memory of the SuperEvent records.
+
+Run from the repository root with
+
+    python gracebot/benchmarks/bench_event_records.py [--events 3500]
+
+The superevents are synthetic copies of a superevent as returned by the Grace
+database, enriched with the VOEvent info. They are parsed from JSON, like the
+responses of the Grace database and the stored events, so their strings aren't
+shared. The default is about the number of superevents of O3 and O4.
+"""
+
+import argparse
+import datetime
+import json
+import random
+import sys
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, "gracebot")
+
+from superevent import SuperEvent  # noqa: E402
+
+event_types = ("BNS", "NSBH", "BBH", "MassGap", "Terrestrial")
+instruments = {"H1": "Hanford", "L1": "Livingston", "V1": "Virgo"}
+
+
+def superevent_json(i: int) -> str:
+    event_id = f"S{190401 + i // 26:06d}{chr(97 + i % 26)}"
+    created = datetime.datetime(2019, 4, 1, tzinfo=datetime.timezone.utc)
+    created += datetime.timedelta(hours=3 * i)
+    api = f"https://gracedb.ligo.org/api/superevents/{event_id}"
+    graceid = f"G{300000 + i}"
+    seen_by = random.sample(list(instruments), random.randint(1, 3))
+    weights = [random.random() ** 4 for _ in event_types]
+    p_astro = {t: w / sum(weights) for t, w in zip(event_types, weights)}
+    gpstime = 1238000000 + 10800 * i
+
+    superevent = {
+        "superevent_id": event_id,
+        "gw_id": None,
+        "category": "Production",
+        "created": created.isoformat(),
+        "submitter": "emfollow",
+        "em_type": None,
+        "t_start": gpstime - 1.0,
+        "t_0": gpstime,
+        "t_end": gpstime + 1.0,
+        "far": random.uniform(1e-12, 1e-7),
+        "time_coinc_far": None,
+        "space_coinc_far": None,
+        "labels": ["EMBRIGHT_READY", "PASTRO_READY", "SKYMAP_READY", "ADVOK"],
+        "links": {
+            name: f"{api}/{name}/"
+            for name in ("events", "labels", "logs", "files", "self", "voevents")
+        },
+        "gw_events": [f"G{300000 + i * 4 + n}" for n in range(4)],
+        "em_events": [],
+        "preferred_event": graceid,
+        "preferred_event_data": {
+            "submitter": "gstlalcbc",
+            "created": created.isoformat(),
+            "group": "CBC",
+            "graceid": graceid,
+            "pipeline": "gstlal",
+            "gpstime": gpstime,
+            "reporting_latency": random.uniform(5, 60),
+            "instruments": ",".join(seen_by),
+            "nevents": 2,
+            "offline": False,
+            "search": "AllSky",
+            "far": random.uniform(1e-12, 1e-7),
+            "far_is_upper_limit": False,
+            "likelihood": random.uniform(10, 100),
+            "labels": ["PASTRO_READY", "EMBRIGHT_READY"],
+            "extra_attributes": {
+                "CoincInspiral": {
+                    "ifos": ",".join(seen_by),
+                    "end_time": gpstime,
+                    "mass": random.uniform(2, 100),
+                    "mchirp": random.uniform(1, 40),
+                    "minimum_duration": None,
+                    "snr": random.uniform(8, 30),
+                    "false_alarm_rate": random.uniform(1e-12, 1e-7),
+                    "combined_far": random.uniform(1e-12, 1e-7),
+                },
+                "SingleInspiral": [
+                    {
+                        "ifo": ifo,
+                        "end_time": gpstime,
+                        "snr": random.uniform(4, 20),
+                        "chisq": random.uniform(0, 2),
+                        "mass1": random.uniform(1, 80),
+                        "mass2": random.uniform(1, 40),
+                        "spin1z": random.uniform(-1, 1),
+                        "spin2z": random.uniform(-1, 1),
+                    }
+                    for ifo in seen_by
+                ],
+            },
+            "links": {
+                name: f"https://gracedb.ligo.org/api/events/{graceid}/{name}"
+                for name in ("neighbors", "log", "emobservations", "files", "labels")
+            },
+        },
+        # Added from the VOEvent
+        "distance_mean_Mly": random.uniform(100, 10000),
+        "distance_std_Mly": random.uniform(50, 3000),
+        "event_types": p_astro,
+        "most_likely": max(p_astro, key=p_astro.__getitem__),
+        "instruments_short": seen_by,
+        "instruments_long": [instruments[ifo] for ifo in seen_by],
+    }
+
+    return json.dumps(superevent)
+
+
+def whole_superevent(document: str) -> dict:
+    event = json.loads(document)
+    event.pop("superevent_id")
+    event["created"] = datetime.datetime.fromisoformat(event["created"])
+
+    return event
+
+
+def record(document: str) -> SuperEvent:
+    return SuperEvent.from_dict(json.loads(document))
+
+
+def measure(documents: list, make: Callable) -> int:
+    tracemalloc.start()
+    events = {str(i): make(document) for i, document in enumerate(documents)}
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del events
+
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=3500)
+    args = parser.parse_args()
+
+    random.seed(0)
+    documents = [superevent_json(i) for i in range(args.events)]
+    whole = measure(documents, whole_superevent)
+    records = measure(documents, record)
+
+    print(f"{args.events} events")
+    print(
+        f"whole superevents: {whole / 2**20:6.2f} MiB, {whole / args.events:6.0f} B/event"
+    )
+    print(
+        f"records:           {records / 2**20:6.2f} MiB, {records / args.events:6.0f} B/event"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare a query over the event records with the same query over the columnar
+event table, and the memory both need.
+
+Run from the repository root with
+
+    python gracebot/benchmarks/bench_event_table.py [--events 5000]
+
+The events are synthetic, with the enrichment keys of the bot.
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+sys.path.insert(0, "gracebot")
+
+from eventtable import EventTable, event_types  # noqa: E402
+from superevent import SuperEvent  # noqa: E402
+
+query = dict(
+    event_type="BNS",
+    min_probability=0.5,
+    max_distance_mly=1000,
+    instruments=("H1", "L1", "V1"),
+)
+
+
+def make_events(n: int) -> Dict[str, SuperEvent]:
+    start = datetime.datetime(2019, 4, 1, tzinfo=datetime.timezone.utc)
+    events = {}
+    for i in range(n):
+        weights = [random.random() ** 4 for _ in event_types]
+        p_astro = {t: w / sum(weights) for t, w in zip(event_types, weights)}
+        distance = random.uniform(100, 10000)
+        events[f"S{i:08d}"] = SuperEvent(
+            created=start + datetime.timedelta(hours=i),
+            event_types=p_astro,
+            most_likely=max(p_astro, key=p_astro.__getitem__),
+            distance_mean_Mly=distance,
+            distance_std_Mly=distance / 4,
+            instruments_short=random.sample(["H1", "L1", "V1"], random.randint(1, 3)),
+        )
+
+    return events
+
+
+def query_records(events: Dict[str, SuperEvent]) -> List[str]:
+    return [
+        event_id
+        for event_id, event in events.items()
+        if event.event_types.get("BNS", 0) > 0.5
+        and event.distance_mean_Mly is not None
+        and event.distance_mean_Mly < 1000
+        and {"H1", "L1", "V1"} <= set(event.instruments_short)
+    ]
+
+
+def timed(func, repeat: int = 100) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=5000)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    events = make_events(args.events)
+    record_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    table = EventTable(events)
+    build = time.perf_counter() - start
+
+    assert query_records(events) == table.query(**query)
+    print(f"{args.events} events, {len(table.query(**query))} matches")
+    print(f"records: {timed(lambda: query_records(events)) * 1e6:8.0f} us per query")
+    print(f"table:   {timed(lambda: table.query(**query)) * 1e6:8.0f} us per query")
+    print(f"table build: {build * 1e3:.1f} ms")
+    print(f"memory of the records: {record_bytes / 2**20:.2f} MiB")
+    print(f"memory of the table: {table.nbytes / 2**20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
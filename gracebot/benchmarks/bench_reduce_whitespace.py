@@ -0,0 +1,89 @@
+"""
+Compare finding the bounding box of the non-white pixels of skymap images with
+`np.where` on the full frame and with chunked row and column reductions, in time
+per image and peak allocated memory.
+
+Run from the repository root with
+
+    python gracebot/benchmarks/bench_reduce_whitespace.py [image.png ...]
+
+Without arguments a synthetic 4000 x 4000 RGBA corner plot is used.
+"""
+
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, "gracebot")
+
+from image import find_bounding_box  # noqa: E402
+
+BoundingBox = Optional[Tuple[int, int, int, int]]
+
+
+def bounding_box_where(img: Image.Image) -> Tuple[int, int, int, int]:
+    pix = np.asarray(img)
+    pix = pix[:, :, 0:3]
+    rows, columns = np.where(pix - 255)[0:2]
+
+    return int(columns.min()), int(rows.min()), int(columns.max()), int(rows.max())
+
+
+def corner_plot(size: int = 4000) -> Image.Image:
+    img = Image.new("RGBA", (size, size), (255, 255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    n = 4
+    cell = (size - 400) // n
+    for row in range(n):
+        for col in range(row + 1):
+            x0, y0 = 200 + col * cell, 200 + row * cell
+            draw.rectangle([x0, y0, x0 + cell - 20, y0 + cell - 20], outline="black")
+            draw.ellipse(
+                [x0 + cell // 4, y0 + cell // 4, x0 + cell // 2, y0 + cell // 2],
+                fill=(30, 80, 200, 255),
+            )
+
+    return img
+
+
+def peak_memory(func, img: Image.Image) -> int:
+    tracemalloc.start()
+    func(img)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+
+def main(number: int = 5) -> None:
+    images: Dict[str, Image.Image] = {
+        fname: Image.open(fname) for fname in sys.argv[1:]
+    }
+    if not images:
+        images = {"synthetic corner plot": corner_plot()}
+
+    methods: Dict[str, Callable[[Image.Image], BoundingBox]] = {
+        "np.where": bounding_box_where,
+        "row/column": find_bounding_box,
+    }
+
+    print(f"{'image':32} {'method':12} {'ms/image':>9} {'peak MiB':>9}")
+    for name, img in images.items():
+        img.load()
+        boxes = {method(img) for method in methods.values()}
+        assert len(boxes) == 1, f"Different bounding boxes for {name}: {boxes}"
+        for method_name, method in methods.items():
+            seconds = timeit.timeit(lambda: method(img), number=number)
+            peak = peak_memory(method, img)
+            print(
+                f"{name[-32:]:32} {method_name:12} {seconds / number * 1e3:9.1f} "
+                f"{peak / 2 ** 20:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
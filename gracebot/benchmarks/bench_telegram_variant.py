@@ -0,0 +1,94 @@
+"""
+Compare the size of the cropped event images with their Telegram variant, and the
+time needed to upload both at a given bandwidth.
+
+Run from the repository root with
+
+    python gracebot/benchmarks/bench_telegram_variant.py [--mbit 10] [image.png ...]
+
+Pass the cropped images, for example everything in gracebot/img/*/. Without
+images a synthetic 2400 x 2400 RGBA corner plot is used.
+"""
+
+import argparse
+import sys
+import time
+from io import BytesIO
+from typing import Dict
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, "gracebot")
+
+from image import telegram_variant  # noqa: E402
+
+
+def corner_plot(size: int = 2400) -> Image.Image:
+    img = Image.new("RGBA", (size, size), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(img)
+    n = 4
+    cell = size // n
+    yy, xx = np.mgrid[0:cell, 0:cell]
+    density = np.exp(-((xx - cell / 2) ** 2 + (yy - cell / 3) ** 2) / (cell**2 / 20))
+    colors = 255 * np.stack([1 - density, 1 - density / 2, np.ones_like(density)], 2)
+    histogram = Image.fromarray(colors.astype(np.uint8)).convert("RGBA")
+    for row in range(n):
+        for col in range(row + 1):
+            img.paste(histogram, (col * cell, row * cell))
+            draw.rectangle(
+                [col * cell, row * cell, (col + 1) * cell - 1, (row + 1) * cell - 1],
+                outline="black",
+            )
+            draw.text((col * cell + 10, row * cell + 10), "m1 [Msun]", fill="black")
+
+    return img
+
+
+def png_size(img: Image.Image, **kwargs) -> int:
+    buffer = BytesIO()
+    img.save(buffer, format="PNG", **kwargs)
+
+    return buffer.tell()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--mbit", type=float, default=10.0, help="Upload bandwidth")
+    args = parser.parse_args()
+
+    images: Dict[str, Image.Image] = {fname: Image.open(fname) for fname in args.images}
+    if not images:
+        images = {"synthetic corner plot": corner_plot()}
+
+    bytes_per_second = args.mbit * 1e6 / 8
+    total_original, total_variant = 0, 0
+    print(
+        f"{'image':32} {'original KiB':>12} {'variant KiB':>12} {'saved':>6} "
+        f"{'encode ms':>9} {'upload s':>14}"
+    )
+    for name, img in images.items():
+        img.load()
+        original = png_size(img)
+
+        start = time.perf_counter()
+        variant = png_size(telegram_variant(img), optimize=True)
+        encode = time.perf_counter() - start
+
+        total_original += original
+        total_variant += variant
+        print(
+            f"{name[-32:]:32} {original / 1024:12.1f} {variant / 1024:12.1f} "
+            f"{1 - variant / original:6.0%} {encode * 1e3:9.1f} "
+            f"{original / bytes_per_second:6.2f} -> {variant / bytes_per_second:4.2f}"
+        )
+
+    print(
+        f"{'total':32} {total_original / 1024:12.1f} {total_variant / 1024:12.1f} "
+        f"{1 - total_variant / total_original:6.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
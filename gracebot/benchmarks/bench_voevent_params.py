@@ -0,0 +1,60 @@
+"""
+Compare getting the Params of the test VOEvents from an ElementTree with iterfind
+and with the single pass parser, in time per parse and peak allocated memory.
+
+Run from the repository root with
+
+    python gracebot/benchmarks/bench_voevent_params.py
+"""
+
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+from xml.etree import ElementTree
+
+sys.path.insert(0, "gracebot")
+
+from voeventparams import parse_params, used_params  # noqa: E402
+
+test_data = Path("gracebot/tests/data/")
+
+
+def parse_tree(payload: bytes) -> Dict[str, str]:
+    root = ElementTree.fromstring(payload)
+    return {
+        elem.attrib["name"]: elem.attrib["value"] for elem in root.iterfind(".//Param")
+    }
+
+
+def peak_memory(func, payload: bytes) -> int:
+    tracemalloc.start()
+    func(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+
+def main(number: int = 2000) -> None:
+    parsers: Dict[str, Callable[[bytes], Dict[str, str]]] = {
+        "tree + iterfind": parse_tree,
+        "single pass": parse_params,
+        "single pass, used": lambda payload: parse_params(payload, used_params),
+    }
+
+    print(f"{'file':32} {'parser':18} {'us/parse':>9} {'peak KiB':>9}")
+    for filename in sorted(test_data.glob("*.xml")):
+        payload = filename.read_bytes()
+        for name, parser in parsers.items():
+            seconds = timeit.timeit(lambda: parser(payload), number=number)
+            peak = peak_memory(parser, payload)
+            print(
+                f"{filename.name:32} {name:18} {seconds / number * 1e6:9.1f} "
+                f"{peak / 1024:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
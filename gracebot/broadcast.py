@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, List
+
+import numpy as np
+from aiogram.utils import exceptions
+
+from ratelimiter import AsyncRateLimiter
+
+
+class BroadcastReport(object):
+    """
+    Delivery statistics of a single broadcast.
+
+    Parameters
+    ----------
+    latencies : list of float
+        Seconds between the start of the broadcast and the moment all messages
+        were delivered to a chat, for every chat which received the broadcast.
+    failed : int
+        Number of chats to which the broadcast couldn't be delivered.
+    """
+
+    def __init__(self, latencies: List[float], failed: int):
+        self.latencies = latencies
+        self.failed = failed
+
+    @property
+    def delivered(self) -> int:
+        return len(self.latencies)
+
+    def percentile(self, q: float) -> float:
+        if len(self.latencies) == 0:
+            return 0.0
+
+        return float(np.percentile(self.latencies, q))
+
+    def __str__(self) -> str:
+        return (
+            f"Broadcast delivered to {self.delivered} chats, {self.failed} failed. "
+            f"Latency p50 {self.percentile(50):.2f} s, "
+            f"p90 {self.percentile(90):.2f} s, "
+            f"p99 {self.percentile(99):.2f} s."
+        )
+
+
+class Broadcaster(object):
+    """
+    Sends messages to many chats at the same time within Telegram's rate limits.
+
+    Telegram allows bots to send about 30 messages per second in total and about
+    one message per second to the same chat. Messages which are refused with a
+    RetryAfter error are send again after the requested time.
+
+    Parameters
+    ----------
+    max_concurrent : int
+        Maximum number of chats which receive messages at the same time.
+    messages_per_second : float
+        Maximum number of messages per second over all chats.
+    chat_interval : float
+        Minimum number of seconds between two messages to the same chat.
+    max_retries : int
+        Number of times a message is send again after a temporary failure.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 20,
+        messages_per_second: float = 25.0,
+        chat_interval: float = 1.0,
+        max_retries: int = 5,
+    ):
+        self.max_concurrent = max_concurrent
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._rate_limiter = AsyncRateLimiter(messages_per_second)
+        self._chat_rate_limiter = AsyncRateLimiter(
+            1 / chat_interval if chat_interval > 0 else 0.0
+        )
+
+    async def send(
+        self, chat_id: int, method: Callable[..., Awaitable], *args, **kwargs
+    ):
+        """
+        Call a bot method which sends a message to `chat_id`, respecting the limits.
+
+        Parameters
+        ----------
+        chat_id : int
+            Chat which receives the message.
+        method : Callable
+            Coroutine function which sends the message, e.g. `Bot.send_message`.
+            Called with `chat_id`, `args` and `kwargs`, again for every retry.
+
+        Returns
+        -------
+        The result of `method`.
+        """
+        backoff = 1.0
+        for attempt in range(self.max_retries + 1):
+            await self._chat_rate_limiter.wait(chat_id)
+            await self._rate_limiter.wait()
+            try:
+                return await method(chat_id, *args, **kwargs)
+            except exceptions.RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logging.warning(f"Flood control for chat {chat_id}: wait {e.timeout} s")
+                await asyncio.sleep(e.timeout)
+            except exceptions.NetworkError as e:
+                if attempt == self.max_retries:
+                    raise
+                logging.warning(f"Retrying message to chat {chat_id}. Exception: {e}")
+                await asyncio.sleep(backoff)
+                backoff *= 2
+
+    async def broadcast(
+        self, chat_ids: Iterable[int], deliver: Callable[[int], Awaitable]
+    ) -> BroadcastReport:
+        """
+        Deliver a broadcast to all chats.
+
+        Parameters
+        ----------
+        chat_ids : iterable of int
+            Chats which should receive the broadcast.
+        deliver : Callable
+            Coroutine function which sends all messages of the broadcast to a single
+            chat. It should send the messages through `send`.
+
+        Returns
+        -------
+        BroadcastReport
+            Delivery statistics of the broadcast.
+        """
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        latencies: List[float] = []
+        failed = 0
+
+        async def deliver_to_chat(chat_id: int) -> None:
+            nonlocal failed
+            async with semaphore:
+                try:
+                    await deliver(chat_id)
+                except exceptions.BotBlocked:
+                    logging.info(f"User {chat_id} has blocked the bot.")
+                    failed += 1
+                except exceptions.TelegramAPIError as e:
+                    logging.error(f"Failed to send broadcast to {chat_id}: {e}")
+                    failed += 1
+                else:
+                    latencies.append(time.monotonic() - start)
+
+        await asyncio.gather(*(deliver_to_chat(chat_id) for chat_id in list(chat_ids)))
+
+        self._chat_rate_limiter.forget_before(start)
+
+        return BroadcastReport(latencies, failed)
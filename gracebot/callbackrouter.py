@@ -0,0 +1,59 @@
+import logging
+from typing import Awaitable, Callable, Dict
+
+from aiogram import types
+
+CallbackHandler = Callable[[types.CallbackQuery, str], Awaitable[None]]
+
+
+class CallbackRouter(object):
+    """
+    Dispatches callback queries of inline keyboards by the prefix of their data.
+
+    Callback data has the form `{prefix}:{payload}`. Handlers are stored in a dict
+    by prefix, so routing a button press takes a single lookup, regardless of how
+    many buttons there are.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, CallbackHandler] = {}
+
+    def register(self, prefix: str, handler: CallbackHandler) -> None:
+        """
+        Let `handler` handle the callback queries with data starting with `prefix:`.
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of the callback data, which may not contain a colon.
+        handler : callable
+            Coroutine function which is called with the callback query and the
+            payload after the prefix.
+        """
+        if ":" in prefix:
+            raise ValueError(f"Prefix {prefix} may not contain a colon.")
+        if prefix in self._handlers:
+            raise ValueError(f"A handler for prefix {prefix} is already registered.")
+
+        self._handlers[prefix] = handler
+
+    def handles(self, query: types.CallbackQuery) -> bool:
+        """
+        Return whether a handler is registered for the callback query.
+        """
+        prefix, _, _ = (query.data or "").partition(":")
+
+        return prefix in self._handlers
+
+    async def dispatch(self, query: types.CallbackQuery) -> None:
+        """
+        Call the handler which is registered for the prefix of the callback query.
+        """
+        prefix, _, payload = (query.data or "").partition(":")
+        handler = self._handlers.get(prefix)
+        if handler is None:
+            logging.warning(f"No handler for callback data {query.data}")
+            await query.answer()
+            return
+
+        await handler(query, payload)
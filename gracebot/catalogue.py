@@ -0,0 +1,121 @@
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from superevent import SuperEvent
+
+
+class DistanceStats(NamedTuple):
+    n_events: int
+    mean: float
+    min: float
+    max: float
+
+
+class CatalogueStats(object):
+    """
+    Aggregates of the event catalogue, which are updated per event.
+
+    Keeps the number of events per most likely event type, the distances per event
+    type and the number of events per combination of detectors. Adding, updating
+    or removing an event only changes the aggregates of that event, so reading them
+    doesn't depend on the number of events. Can be shared between threads.
+
+    Parameters
+    ----------
+    events : dict, optional
+        Events to start with, with the event ids as keys.
+    """
+
+    def __init__(self, events: Optional[Mapping[str, SuperEvent]] = None):
+        self.total = 0
+        self.event_types: Counter = Counter()
+        self.detectors: Counter = Counter()
+        self._distance_sums: Dict[str, float] = {}
+        # Sorted distances per event type, for the minimum and maximum
+        self._distances: Dict[str, List[float]] = {}
+        self._contributions: Dict[str, Tuple[str, Optional[float], tuple]] = {}
+        self._lock = threading.Lock()
+
+        for event_id, event in (events or {}).items():
+            self.add(event_id, event)
+
+    def add(self, event_id: str, event: SuperEvent) -> None:
+        """
+        Add a new event, or update the aggregates of an existing event.
+        """
+        event_type = event.most_likely or ""
+        distance = event.distance_mean_Mly
+        detectors = tuple(sorted(event.instruments_short))
+
+        with self._lock:
+            self._remove(event_id)
+            self._contributions[event_id] = (event_type, distance, detectors)
+            self.total += 1
+            self.event_types[event_type] += 1
+            self.detectors[detectors] += 1
+            if distance is not None:
+                self._distance_sums[event_type] = (
+                    self._distance_sums.get(event_type, 0.0) + distance
+                )
+                insort(self._distances.setdefault(event_type, []), distance)
+
+    def remove(self, event_id: str) -> None:
+        """
+        Remove an event, if it was added.
+        """
+        with self._lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id: str) -> None:
+        contribution = self._contributions.pop(event_id, None)
+        if contribution is None:
+            return
+
+        event_type, distance, detectors = contribution
+        self.total -= 1
+        _decrement(self.event_types, event_type)
+        _decrement(self.detectors, detectors)
+        if distance is not None:
+            self._distance_sums[event_type] -= distance
+            distances = self._distances[event_type]
+            del distances[bisect_left(distances, distance)]
+            if len(distances) == 0:
+                del self._distances[event_type]
+                del self._distance_sums[event_type]
+
+    def detector_counts(self) -> Dict[tuple, int]:
+        """
+        Return the number of events per combination of detectors.
+        """
+        with self._lock:
+            return dict(self.detectors)
+
+    def distance(self, event_type: str) -> Optional[DistanceStats]:
+        """
+        Return the statistics of the distances in Mly of an event type.
+
+        Returns
+        -------
+        DistanceStats or None
+            Number, mean, minimum and maximum of the distances, or None if there are
+            no distances of events of this type.
+        """
+        with self._lock:
+            distances = self._distances.get(event_type)
+            if not distances:
+                return None
+
+            return DistanceStats(
+                n_events=len(distances),
+                mean=self._distance_sums[event_type] / len(distances),
+                min=distances[0],
+                max=distances[-1],
+            )
+
+
+def _decrement(counter: Counter, key) -> None:
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
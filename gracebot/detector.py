@@ -1,8 +1,14 @@
+import asyncio
 import logging
 import requests
 
 from datetime import timedelta, datetime
 from html.parser import HTMLParser
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from detectorhistory import DetectorHistory
+
+default_source = "https://ldas-jobs.ligo.caltech.edu/~gwistat/gwistat/gwistat.html"
 
 
 class MyHTMLParser(HTMLParser):
@@ -15,12 +21,20 @@ class MyHTMLParser(HTMLParser):
             self.data.append(data)
 
 
-retrieve_date = datetime(1987, 4, 3)
-text = ""
+class DetectorStatus(NamedTuple):
+    name: str
+    status: str
+    status_icon: str
+    status_duration: timedelta
+
+
+class StatusSnapshot(NamedTuple):
+    retrieved: datetime
+    detectors: Tuple[DetectorStatus, ...]
 
 
 class Detector:
-    default_source = "https://ldas-jobs.ligo.caltech.edu/~gwistat/gwistat/gwistat.html"
+    default_source = default_source
 
     def __init__(self, name, source=default_source):
         self.name = name
@@ -30,70 +44,202 @@ class Detector:
         self.status_duration = timedelta(0)
         self.__post_init__()
 
-    @property
-    def age(self):
-        global retrieve_date
-        return datetime.now() - retrieve_date
-
     def __post_init__(self):
-        global retrieve_date
-        global text
-
-        if self.age < timedelta(minutes=1):
-            pass
-        elif self._remote_source():
-            text = requests.get(self.source).text
-            retrieve_date = datetime.now()
-        else:
-            with open(self.source, "r") as file:
-                text = file.read()
-
-        parser = MyHTMLParser()
-        parser.feed(text)
-
-        detector_index = [i for i, t in enumerate(parser.data) if self.name in t][0]
-
-        status_raw = parser.data[detector_index + 1]
-        self.status = status_raw.replace("_", " ").lower().capitalize()
-
-        self.status_icon = self._get_status_icon()
-
-        duration = parser.data[detector_index + 2]
-        self.status_duration = self._convert_to_time(duration)
-
-    def _get_status_icon(self) -> str:
-        check_mark = ":white_check_mark:"
-        cross = ":x:"
-        construction = ":construction:"
-        status_mapper = {
-            "observing": check_mark,
-            "up": check_mark,
-            "science": check_mark,
-            "not locked": cross,
-            "down": cross,
-            "info too old": cross,
-            "maintenance": construction,
-            "locking": construction,
-            "troubleshooting": construction,
-            "calibration": construction,
-        }
-
-        status_icon = status_mapper.get(self.status.lower(), ":question:")
-        if status_icon == ":question:":
-            logging.warning(f"Unknown status {self.status}")
-
-        return status_icon
-
-    def _remote_source(self) -> bool:
-        return self.source.split(":")[0] == "https"
-
-    def _convert_to_time(self, time_string: str) -> timedelta:
+        text = read_source(self.source)
+        _, self.status, self.status_icon, self.status_duration = parse_status(
+            self.name, parse_page(text)
+        )
+
+
+class DetectorStatusBoard(object):
+    """
+    Status of all detectors, which is refreshed in the background.
+
+    The status page is downloaded and parsed once per refresh for all detectors.
+    Every refresh publishes a new immutable snapshot, so reading the status never
+    waits for the status page.
+
+    Parameters
+    ----------
+    names : sequence of str
+        Names of the detectors as shown on the status page.
+    source : str
+        URL or local path of the status page.
+    refresh_interval : float
+        Seconds between two refreshes.
+    history : DetectorHistory, optional
+        If given, every snapshot is added to this history.
+    max_age : float, optional
+        Seconds after which a snapshot is stale, by default five refresh
+        intervals. A stale snapshot is refreshed when it is read.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str] = ("Hanford", "Livingston", "Virgo"),
+        source: str = default_source,
+        refresh_interval: float = 60,
+        history: Optional[DetectorHistory] = None,
+        max_age: Optional[float] = None,
+    ):
+        self.names = tuple(names)
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.max_age = timedelta(
+            seconds=5 * refresh_interval if max_age is None else max_age
+        )
+        self.snapshot: Optional[StatusSnapshot] = None
+        self.history = history
+
+    def refresh(self) -> StatusSnapshot:
+        """
+        Download and parse the status page and publish a new snapshot.
+
+        Returns
+        -------
+        StatusSnapshot
+            The new snapshot.
+        """
+        page = parse_page(read_source(self.source))
+        snapshot = StatusSnapshot(
+            retrieved=datetime.now(),
+            detectors=tuple(parse_status(name, page) for name in self.names),
+        )
+        self.snapshot = snapshot
+        if self.history is not None:
+            self.history.record(snapshot)
+
+        return snapshot
+
+    def is_stale(self, snapshot: StatusSnapshot) -> bool:
+        """
+        Return whether a snapshot is older than `max_age`.
+        """
+        return datetime.now() - snapshot.retrieved > self.max_age
+
+    async def get_snapshot(self) -> StatusSnapshot:
+        """
+        Return the latest snapshot, refreshing it if there is none or it is stale.
+
+        If a stale snapshot can't be refreshed, it is returned anyway. Use
+        `is_stale` to check whether it is up to date.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and not self.is_stale(snapshot):
+            return snapshot
+
+        loop = asyncio.get_event_loop()
         try:
-            hours, minutes = time_string.split(":")
-            h = int(hours[1:]) if hours[0] == ">" else int(hours)
-            m = int(minutes)
-        except ValueError:
-            logging.error(f"Could not convert the string '{time_string}' to a time.")
-            h, m = 0, 0
-
-        return timedelta(hours=h, minutes=m)
+            return await loop.run_in_executor(None, self.refresh)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if snapshot is None:
+                raise
+            logging.warning(
+                f"Serving the detector status of {snapshot.retrieved:%Y-%m-%d %H:%M}"
+                f", because it couldn't be refreshed. Exception: {e}"
+            )
+            return snapshot
+
+    async def run(self) -> None:
+        """
+        Refresh the status every `refresh_interval` seconds.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.refresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Failed to refresh the detector status. Exception: {e}")
+                if self.snapshot is not None and self.is_stale(self.snapshot):
+                    logging.warning(
+                        "The detector status wasn't refreshed since "
+                        f"{self.snapshot.retrieved:%Y-%m-%d %H:%M}."
+                    )
+
+            await asyncio.sleep(self.refresh_interval)
+
+
+def read_source(source: str) -> str:
+    """
+    Return the status page from an URL or a local file.
+    """
+    if source.split(":")[0] == "https":
+        return requests.get(source, timeout=30).text
+
+    with open(source, "r") as file:
+        return file.read()
+
+
+def parse_page(text: str) -> List[str]:
+    parser = MyHTMLParser()
+    parser.feed(text)
+
+    return parser.data
+
+
+def parse_status(name: str, page: List[str]) -> DetectorStatus:
+    """
+    Get the status of a detector from the text of the status page.
+
+    Parameters
+    ----------
+    name : str
+        Name of the detector.
+    page : list of str
+        Text of the status page, as parsed by `MyHTMLParser`.
+
+    Returns
+    -------
+    DetectorStatus
+        The status of the detector.
+    """
+    detector_index = [i for i, t in enumerate(page) if name in t][0]
+
+    status_raw = page[detector_index + 1]
+    status = status_raw.replace("_", " ").lower().capitalize()
+
+    duration = page[detector_index + 2]
+
+    return DetectorStatus(
+        name, status, get_status_icon(status), convert_to_time(duration)
+    )
+
+
+def get_status_icon(status: str) -> str:
+    check_mark = ":white_check_mark:"
+    cross = ":x:"
+    construction = ":construction:"
+    status_mapper = {
+        "observing": check_mark,
+        "up": check_mark,
+        "science": check_mark,
+        "not locked": cross,
+        "down": cross,
+        "info too old": cross,
+        "maintenance": construction,
+        "locking": construction,
+        "troubleshooting": construction,
+        "calibration": construction,
+    }
+
+    status_icon = status_mapper.get(status.lower(), ":question:")
+    if status_icon == ":question:":
+        logging.warning(f"Unknown status {status}")
+
+    return status_icon
+
+
+def convert_to_time(time_string: str) -> timedelta:
+    try:
+        hours, minutes = time_string.split(":")
+        h = int(hours[1:]) if hours[0] == ">" else int(hours)
+        m = int(minutes)
+    except ValueError:
+        logging.error(f"Could not convert the string '{time_string}' to a time.")
+        h, m = 0, 0
+
+    return timedelta(hours=h, minutes=m)
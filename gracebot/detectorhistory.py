@@ -0,0 +1,311 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Detectors and states are stored by their index in these tuples, so new names
+# must be appended at the end.
+detector_names = ("Hanford", "Livingston", "Virgo", "KAGRA", "GEO")
+states = (
+    "unknown",
+    "observing",
+    "up",
+    "science",
+    "not locked",
+    "down",
+    "info too old",
+    "maintenance",
+    "locking",
+    "troubleshooting",
+    "calibration",
+)
+observing_states = ("observing", "up", "science")
+
+run_dtype = np.dtype(
+    [("start", "<f8"), ("end", "<f8"), ("detector", "u1"), ("state", "u1")]
+)
+
+
+class Stretch(NamedTuple):
+    start: datetime
+    end: datetime
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end - self.start
+
+
+class DetectorHistory(object):
+    """
+    Run length encoded history of the detector states, stored in a binary file.
+
+    Every row of the file is a run of a single detector in a single state, with
+    the time of its first sample and the time until which it lasted. A state lasts
+    until the next sample, so a new sample in the same state only extends the end
+    of the run, which is overwritten in place. The file only grows when a state
+    changes. If no sample was recorded for more than `max_gap` seconds, a new run
+    is started and the time in between counts as having no data.
+
+    Parameters
+    ----------
+    fname : str
+        File in which the runs are stored.
+    max_gap : float
+        Maximum number of seconds between two samples of the same run.
+    """
+
+    def __init__(self, fname: str = "detector_history.bin", max_gap: float = 300.0):
+        self.fname = fname
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self._runs = self._read()
+        self._last_row = {
+            detector: int(np.flatnonzero(self._runs["detector"] == detector)[-1])
+            for detector in np.unique(self._runs["detector"])
+        }
+
+    def _read(self) -> np.ndarray:
+        if not os.path.isfile(self.fname):
+            return np.empty(0, dtype=run_dtype)
+
+        runs = np.fromfile(self.fname, dtype=run_dtype)
+        if os.path.getsize(self.fname) != runs.nbytes:
+            logging.warning(f"Ignoring incomplete last run in {self.fname}")
+            with open(self.fname, "r+b") as f:
+                f.truncate(runs.nbytes)
+
+        return runs
+
+    def record(self, snapshot) -> None:
+        """
+        Add the status of all detectors in a snapshot of the detector status.
+
+        Parameters
+        ----------
+        snapshot : detector.StatusSnapshot
+            Snapshot with the time of retrieval and the status of the detectors.
+        """
+        for detector in snapshot.detectors:
+            self.add(detector.name, detector.status, snapshot.retrieved)
+
+    def add(self, name: str, status: str, time: datetime) -> None:
+        """
+        Add a single sample of the state of a detector.
+
+        Parameters
+        ----------
+        name : str
+            Name of the detector, one of `detector_names`.
+        status : str
+            Status of the detector, as shown on the status page.
+        time : datetime
+            When the status was retrieved.
+        """
+        detector = detector_names.index(name)
+        state = _state_code(status)
+        timestamp = time.timestamp()
+
+        with self._lock:
+            row = self._last_row.get(detector)
+            if (
+                row is not None
+                and 0 <= timestamp - self._runs["end"][row] <= self.max_gap
+            ):
+                # The previous state lasted until this sample
+                self._runs["end"][row] = timestamp
+                self._write_run(row)
+                if self._runs["state"][row] == state:
+                    return
+
+            new_run = np.array([(timestamp, timestamp, detector, state)], run_dtype)
+            self._runs = np.concatenate([self._runs, new_run])
+            self._last_row[detector] = len(self._runs) - 1
+            with open(self.fname, "ab") as f:
+                f.write(new_run.tobytes())
+
+    def _write_run(self, row: int) -> None:
+        with open(self.fname, "r+b") as f:
+            f.seek(row * run_dtype.itemsize)
+            f.write(self._runs[row : row + 1].tobytes())
+
+    def _intervals(
+        self, detectors: Sequence[str], min_count: int, observing: bool = True
+    ) -> np.ndarray:
+        """
+        Intervals in which at least `min_count` of `detectors` have data.
+
+        Parameters
+        ----------
+        detectors : sequence of str
+            Names of the detectors.
+        min_count : int
+            Minimum number of detectors.
+        observing : bool
+            Only count detectors which are observing.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (n, 2) with the start and end timestamps of disjoint
+            intervals, sorted by time.
+        """
+        with self._lock:
+            runs = self._runs
+
+        codes = [detector_names.index(name) for name in detectors]
+        selected = np.isin(runs["detector"], codes)
+        if observing:
+            observing_codes = [states.index(state) for state in observing_states]
+            selected &= np.isin(runs["state"], observing_codes)
+        runs = runs[selected]
+        if len(runs) == 0 or min_count < 1:
+            return np.empty((0, 2))
+
+        # Count the detectors at every start and end of a run. Starts go before
+        # ends at the same time, so touching runs don't split an interval.
+        times = np.concatenate([runs["start"], runs["end"]])
+        steps = np.concatenate([np.ones(len(runs)), -np.ones(len(runs))])
+        order = np.lexsort((-steps, times))
+        times = times[order]
+        counts = np.cumsum(steps[order])
+
+        enough = counts >= min_count
+        changes = np.flatnonzero(np.diff(np.concatenate([[False], enough, [False]])))
+        starts, ends = times[changes[::2]], times[changes[1::2]]
+        keep = ends > starts
+
+        return np.column_stack([starts[keep], ends[keep]])
+
+    def duty_cycle(
+        self, detector: str, start: datetime, end: Optional[datetime] = None
+    ) -> float:
+        """
+        Fraction of the time in which a detector was observing.
+
+        Parameters
+        ----------
+        detector : str
+            Name of the detector.
+        start : datetime
+            Start of the time window.
+        end : datetime, optional
+            End of the time window, by default now.
+
+        Returns
+        -------
+        float
+            Fraction of the window for which there is data, in which the detector
+            was observing. NaN if there is no data in the window.
+        """
+        return self.network_uptime(start, end, detectors=[detector])
+
+    def network_uptime(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        detectors: Optional[Sequence[str]] = None,
+        min_detectors: Optional[int] = None,
+    ) -> float:
+        """
+        Fraction of the time in which enough detectors were observing.
+
+        Parameters
+        ----------
+        start : datetime
+            Start of the time window.
+        end : datetime, optional
+            End of the time window, by default now.
+        detectors : sequence of str, optional
+            Names of the detectors in the network, by default all detectors with
+            recorded data.
+        min_detectors : int, optional
+            Minimum number of observing detectors, by default all `detectors`.
+
+        Returns
+        -------
+        float
+            Fraction of the window for which there is data, in which at least
+            `min_detectors` were observing. NaN if there is no data in the window.
+        """
+        detectors = self._detectors(detectors)
+        min_detectors = len(detectors) if min_detectors is None else min_detectors
+        t0, t1 = _window(start, end)
+
+        covered = _total(np.clip(self._intervals(detectors, 1, False), t0, t1))
+        if covered <= 0:
+            return float("nan")
+
+        up = _total(np.clip(self._intervals(detectors, min_detectors), t0, t1))
+
+        return up / covered
+
+    def longest_stretch(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        detectors: Optional[Sequence[str]] = None,
+        min_detectors: Optional[int] = None,
+    ) -> Optional[Stretch]:
+        """
+        Longest uninterrupted time in which enough detectors were observing.
+
+        Parameters
+        ----------
+        start : datetime
+            Start of the time window.
+        end : datetime, optional
+            End of the time window, by default now.
+        detectors : sequence of str, optional
+            Names of the detectors, by default all detectors with recorded data.
+        min_detectors : int, optional
+            Minimum number of observing detectors, by default all `detectors`.
+
+        Returns
+        -------
+        Stretch or None
+            Start and end of the longest stretch within the window, or None if
+            the detectors weren't observing in the window.
+        """
+        detectors = self._detectors(detectors)
+        min_detectors = len(detectors) if min_detectors is None else min_detectors
+        t0, t1 = _window(start, end)
+
+        intervals = np.clip(self._intervals(detectors, min_detectors), t0, t1)
+        durations = intervals[:, 1] - intervals[:, 0]
+        if len(durations) == 0 or durations.max() <= 0:
+            return None
+
+        longest = intervals[np.argmax(durations)]
+
+        return Stretch(
+            datetime.fromtimestamp(longest[0]), datetime.fromtimestamp(longest[1])
+        )
+
+    def _detectors(self, detectors: Optional[Iterable[str]]) -> List[str]:
+        if detectors is not None:
+            return list(detectors)
+
+        with self._lock:
+            codes = np.unique(self._runs["detector"])
+
+        return [detector_names[code] for code in codes]
+
+
+def _state_code(status: str) -> int:
+    try:
+        return states.index(status.lower())
+    except ValueError:
+        return states.index("unknown")
+
+
+def _total(intervals: np.ndarray) -> float:
+    return float(np.sum(intervals[:, 1] - intervals[:, 0]))
+
+
+def _window(start: datetime, end: Optional[datetime]):
+    end = datetime.now() if end is None else end
+
+    return start.timestamp(), end.timestamp()
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class DiskCache(object):
+    """
+    Size bounded least recently used cache of files in a local directory.
+
+    Every entry is stored in a file named after the SHA-256 hash of its key. An
+    index with the key, size and last access time of every entry is saved next to
+    the files. When the total size exceeds `max_bytes`, the least recently used
+    entries are removed. Files in the directory which aren't in the index, such as
+    temporary files left by a crash, are removed on start up, so they don't take
+    space outside the budget. Can be shared between threads.
+
+    Parameters
+    ----------
+    directory : str
+        Where the cached files are stored.
+    max_bytes : int
+        Maximum total size of the cached files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 50_000_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index_fname = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index: OrderedDict = self._read_index()
+        self.size = sum(entry["size"] for entry in self._index.values())
+        self._remove_unindexed()
+
+    def _read_index(self) -> OrderedDict:
+        try:
+            with open(self._index_fname, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return OrderedDict()
+        except ValueError:
+            logging.warning(f"Ignoring corrupt cache index {self._index_fname}")
+            return OrderedDict()
+
+        entries = {
+            name: entry
+            for name, entry in entries.items()
+            if os.path.isfile(self._path(name))
+        }
+        return OrderedDict(
+            sorted(entries.items(), key=lambda item: item[1]["last_access"])
+        )
+
+    def _remove_unindexed(self) -> None:
+        for root, dirs, files in os.walk(self.directory, topdown=False):
+            for fname in files:
+                path = os.path.join(root, fname)
+                name = os.path.relpath(path, self.directory)
+                if path != self._index_fname and name not in self._index:
+                    logging.info(f"Removing {path}, which isn't in the cache index")
+                    os.remove(path)
+            if root != self.directory and not os.listdir(root):
+                os.rmdir(root)
+
+    def _save_index(self) -> None:
+        tmp_fname = f"{self._index_fname}.tmp"
+        with open(tmp_fname, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_fname, self._index_fname)
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _touch(self, name: str) -> bool:
+        with self._lock:
+            if name not in self._index:
+                return False
+            self._index[name]["last_access"] = time.time()
+            self._index.move_to_end(name)
+
+        return True
+
+    def _drop(self, name: str) -> None:
+        with self._lock:
+            entry = self._index.pop(name, None)
+            if entry is not None:
+                self.size -= entry["size"]
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Return the cached value of `key`, or None if it isn't cached.
+        """
+        name = self._name(key)
+        if not self._touch(name):
+            return None
+
+        try:
+            with open(self._path(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            self._drop(name)
+            return None
+
+    def get_path(self, key: str) -> Optional[str]:
+        """
+        Return the path of the cached file of `key`, or None if it isn't cached.
+        """
+        name = self._name(key)
+        if not self._touch(name):
+            return None
+
+        path = self._path(name)
+        if not os.path.isfile(path):
+            self._drop(name)
+            return None
+
+        return path
+
+    def put_bytes(self, key: str, value: bytes) -> None:
+        """
+        Cache `value` under `key` and remove old entries if the cache is too large.
+        """
+        path = self._path(self._name(key))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(value)
+
+        self.put_file(key, tmp_path)
+
+    def put_file(self, key: str, src: str, **metadata: Any) -> str:
+        """
+        Move a file into the cache under `key`.
+
+        The file is renamed, so it should be on the same file system as the cache.
+
+        Parameters
+        ----------
+        key : str
+        src : str
+            Path of the file.
+        **metadata
+            Extra information which is stored in the index entry.
+
+        Returns
+        -------
+        str
+            Path of the cached file.
+        """
+        name = self._name(key)
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(src)
+        os.replace(src, path)
+
+        with self._lock:
+            old_entry = self._index.pop(name, None)
+            if old_entry is not None:
+                self.size -= old_entry["size"]
+            self._index[name] = {
+                **metadata,
+                "key": key,
+                "size": size,
+                "last_access": time.time(),
+            }
+            self.size += size
+            self._evict()
+            self._save_index()
+
+        return path
+
+    def remove(self, key: str) -> None:
+        """
+        Remove `key` from the cache.
+        """
+        name = self._name(key)
+        with self._lock:
+            entry = self._index.pop(name, None)
+            if entry is None:
+                return
+            self.size -= entry["size"]
+            self._remove_file(name)
+            self._save_index()
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and len(self._index) > 1:
+            name, entry = self._index.popitem(last=False)
+            self.size -= entry["size"]
+            self._remove_file(name)
+            logging.debug(f"Removed {entry['key']} from cache {self.directory}")
+
+    def _remove_file(self, name: str) -> None:
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def get_json(self, key: str) -> Optional[Any]:
+        value = self.get_bytes(key)
+        if value is None:
+            return None
+
+        return json.loads(value.decode("utf-8"))
+
+    def put_json(self, key: str, value: Any) -> None:
+        self.put_bytes(key, json.dumps(value).encode("utf-8"))
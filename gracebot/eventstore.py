@@ -0,0 +1,111 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator
+
+from superevent import SuperEvent
+
+
+class EventStore(object):
+    """
+    Saves the enriched superevents in a local SQLite database.
+
+    Every event is stored as a JSON document, together with its creation date so
+    the events can be loaded newest first without sorting them in Python.
+    """
+
+    def __init__(self, fname: str):
+        self.fname = fname
+        self._lock = threading.Lock()
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "event_id TEXT PRIMARY KEY, created TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS events_created ON events (created)"
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            connection = sqlite3.connect(self.fname)
+            try:
+                with connection:
+                    yield connection
+            finally:
+                connection.close()
+
+    def load(self) -> Dict[str, SuperEvent]:
+        """
+        Return all stored events, newest first.
+
+        Returns
+        -------
+        dict
+            Keys are the event ids and the values the events.
+        """
+        data = {}
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT event_id, data FROM events ORDER BY created DESC"
+            )
+            for event_id, document in rows:
+                try:
+                    data[event_id] = _from_json(document)
+                except (ValueError, KeyError) as e:
+                    logging.warning(f"Skipping stored event {event_id}. Exception: {e}")
+
+        return data
+
+    def save(self, events: Dict[str, SuperEvent]) -> None:
+        """
+        Insert new events or replace the stored version of existing ones.
+
+        Parameters
+        ----------
+        events : dict
+            Keys are the event ids and the values the events.
+
+        Returns
+        -------
+        None
+        """
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?)", _to_rows(events)
+            )
+
+    def replace_all(self, events: Dict[str, SuperEvent]) -> None:
+        """
+        Replace all stored events with `events` in a single transaction.
+        """
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM events")
+            connection.executemany(
+                "INSERT INTO events VALUES (?, ?, ?)", _to_rows(events)
+            )
+
+    def remove(self, event_ids: Iterable[str]) -> None:
+        with self._transaction() as connection:
+            connection.executemany(
+                "DELETE FROM events WHERE event_id = ?",
+                [(event_id,) for event_id in event_ids],
+            )
+
+
+def _to_rows(events: Dict[str, SuperEvent]) -> list:
+    return [
+        (event_id, event.created.isoformat(), _to_json(event))
+        for event_id, event in events.items()
+    ]
+
+
+def _to_json(event: SuperEvent) -> str:
+    return json.dumps(event.to_dict())
+
+
+def _from_json(document: str) -> SuperEvent:
+    return SuperEvent.from_dict(json.loads(document))
@@ -0,0 +1,158 @@
+import datetime
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from superevent import SuperEvent
+
+event_types = ("BNS", "NSBH", "BBH", "MassGap", "Terrestrial")
+instrument_bits = {"H1": 1, "L1": 2, "V1": 4, "K1": 8}
+
+
+class EventTable(object):
+    """
+    Columnar copy of the events, to filter them with vectorized NumPy operations.
+
+    Every column is an array with a row per event, in the same order as the
+    events. Missing probabilities and distances are NaN and the most likely event
+    type is -1 if it is unknown.
+
+    Parameters
+    ----------
+    events : dict
+        Events with the event ids as keys, as in `Events.data`.
+    version : int
+        Version of the events the table was made from.
+
+    Attributes
+    ----------
+    ids : numpy.ndarray
+        Event ids.
+    created : numpy.ndarray
+        Creation times as POSIX timestamps.
+    p_astro : numpy.ndarray
+        Probabilities of the event types, with a column per type in `event_types`.
+    most_likely : numpy.ndarray
+        Index of the most likely event type in `event_types`.
+    distance_mean, distance_std : numpy.ndarray
+        Distance and its standard deviation in Mly.
+    instruments : numpy.ndarray
+        Detectors which measured the event, as a bitmask of `instrument_bits`.
+    """
+
+    def __init__(self, events: Mapping[str, SuperEvent], version: int = 0):
+        self.version = version
+        n = len(events)
+        self.ids = np.array(list(events.keys()), dtype=str)
+        self.created = np.empty(n, dtype=np.float64)
+        self.p_astro = np.full((n, len(event_types)), np.nan, dtype=np.float32)
+        self.distance_mean = np.full(n, np.nan, dtype=np.float32)
+        self.distance_std = np.full(n, np.nan, dtype=np.float32)
+        self.instruments = np.zeros(n, dtype=np.uint8)
+        self._rows: Dict[str, int] = {}
+
+        for row, (event_id, event) in enumerate(events.items()):
+            self._rows[event_id] = row
+            self.created[row] = event.created.timestamp()
+            for column, event_type in enumerate(event_types):
+                self.p_astro[row, column] = event.event_types.get(event_type, np.nan)
+            self.distance_mean[row] = event.distance_mean_Mly
+            self.distance_std[row] = event.distance_std_Mly
+            self.instruments[row] = instrument_mask(event.instruments_short)
+
+        known = ~np.isnan(self.p_astro).all(axis=1)
+        self.most_likely = np.full(n, -1, dtype=np.int8)
+        self.most_likely[known] = np.nanargmax(self.p_astro[known], axis=1)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.nbytes
+            for column in (
+                self.ids,
+                self.created,
+                self.p_astro,
+                self.most_likely,
+                self.distance_mean,
+                self.distance_std,
+                self.instruments,
+            )
+        )
+
+    def row(self, event_id: str) -> int:
+        return self._rows[event_id]
+
+    def mask(
+        self,
+        event_type: Optional[str] = None,
+        min_probability: float = 0.0,
+        most_likely: Optional[str] = None,
+        max_distance_mly: Optional[float] = None,
+        instruments: Optional[Iterable[str]] = None,
+        created_after: Optional[datetime.datetime] = None,
+        created_before: Optional[datetime.datetime] = None,
+    ) -> np.ndarray:
+        """
+        Return which events match all of the given conditions.
+
+        Parameters
+        ----------
+        event_type : str, optional
+            Event type whose probability must be larger than `min_probability`.
+        min_probability : float
+            Minimum probability of `event_type`.
+        most_likely : str, optional
+            Most likely event type.
+        max_distance_mly : float, optional
+            Maximum distance in Mly.
+        instruments : iterable of str, optional
+            Detectors which must all have measured the event, e.g. ('H1', 'L1').
+        created_after, created_before : datetime.datetime, optional
+            Range of the creation time.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean array with a row per event.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if event_type is not None:
+            probability = self.p_astro[:, event_types.index(event_type)]
+            mask &= probability > min_probability
+        if most_likely is not None:
+            mask &= self.most_likely == event_types.index(most_likely)
+        if max_distance_mly is not None:
+            mask &= self.distance_mean < max_distance_mly
+        if instruments is not None:
+            required = instrument_mask(instruments)
+            mask &= (self.instruments & required) == required
+        if created_after is not None:
+            mask &= self.created >= created_after.timestamp()
+        if created_before is not None:
+            mask &= self.created < created_before.timestamp()
+
+        return mask
+
+    def query(self, **conditions) -> List[str]:
+        """
+        Return the ids of the events which match all conditions.
+
+        See Also
+        --------
+        EventTable.mask
+        """
+        return self.ids[self.mask(**conditions)].tolist()
+
+
+def instrument_mask(instruments: Iterable[str]) -> int:
+    """
+    Return the bitmask of a list of detectors, e.g. ['H1', 'L1'].
+    """
+    mask = 0
+    for instrument in instruments:
+        mask |= instrument_bits.get(instrument, 0)
+
+    return mask
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+
+class FileIdCache(object):
+    """
+    Holds and saves the Telegram file ids of uploaded images in a local JSON file.
+
+    After an image is uploaded once, Telegram can send it again by its file id.
+    Every file id is stored together with a hash of the uploaded image, so the
+    file id is only used as long as the image on disk doesn't change. Since all
+    images of an event are stored in the same directory, storing the file id of a
+    newer image removes the file ids of the older images of that event.
+    """
+
+    def __init__(self, fname: str):
+        self.fname = fname
+        self.data: Dict[str, Dict[str, str]] = self._read()
+        # Hashes per path, together with the modification time and size of the file
+        # when it was hashed.
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+
+    def _read(self) -> dict:
+        try:
+            with open(self.fname, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning(f"Ignoring corrupt file id cache {self.fname}")
+            return {}
+
+    def _save_data(self) -> None:
+        tmp_fname = f"{self.fname}.tmp"
+        with open(tmp_fname, "w") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_fname, self.fname)
+
+    def _hash(self, path: str) -> str:
+        stat = os.stat(path)
+        mtime, size, sha = self._hashes.get(path, (-1, -1, ""))
+        if (mtime, size) != (stat.st_mtime_ns, stat.st_size):
+            with open(path, "rb") as f:
+                sha = hashlib.sha256(f.read()).hexdigest()
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, sha)
+
+        return sha
+
+    def get(self, path: str) -> Optional[str]:
+        """
+        Return the file id of an image, if the image was uploaded before.
+
+        Parameters
+        ----------
+        path : str
+            Local path of the image.
+
+        Returns
+        -------
+        str or None
+            Telegram file id, or None if the image wasn't uploaded yet or changed
+            since it was uploaded.
+        """
+        entry = self.data.get(path)
+        if entry is None:
+            return None
+
+        try:
+            if self._hash(path) == entry["sha256"]:
+                return entry["file_id"]
+        except FileNotFoundError:
+            pass
+
+        self.remove(path)
+        return None
+
+    def add(self, path: str, file_id: str) -> None:
+        """
+        Store the file id of an uploaded image and forget older images of the event.
+
+        Parameters
+        ----------
+        path : str
+            Local path of the image.
+        file_id : str
+            Telegram file id of the uploaded image.
+
+        Returns
+        -------
+        None
+        """
+        directory = os.path.dirname(path)
+        for old_path in [p for p in self.data if os.path.dirname(p) == directory]:
+            del self.data[old_path]
+
+        self.data[path] = {"sha256": self._hash(path), "file_id": file_id}
+        self._save_data()
+
+    def remove(self, path: str) -> None:
+        if self.data.pop(path, None) is not None:
+            self._save_data()
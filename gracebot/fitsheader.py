@@ -0,0 +1,268 @@
+import logging
+import math
+import zlib
+from typing import Any, Dict, Optional, Union
+
+import requests
+
+BLOCK_SIZE = 2880
+CARD_SIZE = 80
+
+HeaderValue = Union[str, int, float, bool, None]
+
+
+class FitsHeaderError(Exception):
+    pass
+
+
+class RangeReader(object):
+    """
+    Reads a remote file from the start, requesting more bytes only when needed.
+
+    If the server doesn't support range requests, the whole response is streamed
+    instead, of which only the needed part is read.
+
+    Parameters
+    ----------
+    url : str
+        URL of the file.
+    chunk_size : int
+        Number of bytes in the first request. Each following request is twice as
+        large.
+    """
+
+    def __init__(self, url: str, chunk_size: int = 4 * BLOCK_SIZE, timeout: float = 30):
+        self.url = url
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.bytes_received = 0
+        self._position = 0
+        self._stream: Optional[requests.Response] = None
+
+    def read_chunk(self) -> bytes:
+        """
+        Return the next chunk of the file, or an empty bytes object at the end.
+        """
+        if self._stream is not None:
+            return self._read_stream()
+
+        end = self._position + self.chunk_size - 1
+        response = requests.get(
+            self.url,
+            headers={"Range": f"bytes={self._position}-{end}"},
+            stream=True,
+            timeout=self.timeout,
+        )
+        if response.status_code == 416:
+            response.close()
+            return b""
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            if self._position > 0:
+                response.close()
+                raise FitsHeaderError(f"{self.url} stopped supporting ranges")
+            logging.info(f"No range requests for {self.url}, streaming instead.")
+            self._stream = response
+            return self._read_stream()
+
+        chunk = response.content
+        self._position += len(chunk)
+        self.bytes_received += len(chunk)
+        self.chunk_size *= 2
+
+        return chunk
+
+    def _read_stream(self) -> bytes:
+        assert self._stream is not None
+        chunk = self._stream.raw.read(self.chunk_size, decode_content=True)
+        self.bytes_received += len(chunk)
+
+        return chunk
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+
+
+class ByteStream(object):
+    """
+    Gives the (decompressed) bytes of a `RangeReader` as a sequential stream.
+    """
+
+    def __init__(self, reader: RangeReader):
+        self._reader = reader
+        self._buffer = bytearray()
+        self._decompressor: Optional[Any] = None
+        self._first_chunk = True
+
+    def _fill(self, size: int) -> None:
+        while len(self._buffer) < size:
+            chunk = self._reader.read_chunk()
+            if len(chunk) == 0:
+                raise FitsHeaderError(f"Unexpected end of file {self._reader.url}")
+
+            if self._first_chunk:
+                self._first_chunk = False
+                if chunk[:2] == b"\x1f\x8b":
+                    self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+            if self._decompressor is not None:
+                chunk = self._decompressor.decompress(chunk)
+            self._buffer += chunk
+
+    def read(self, size: int) -> bytes:
+        self._fill(size)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return data
+
+    def skip(self, size: int) -> None:
+        while size > 0:
+            step = min(size, 64 * BLOCK_SIZE)
+            self.read(step)
+            size -= step
+
+
+def parse_value(value: str) -> HeaderValue:
+    """
+    Convert the value part of a header card to a Python value.
+
+    Parameters
+    ----------
+    value : str
+        Everything after the '= ' of the card, including an optional comment.
+
+    Returns
+    -------
+    str, int, float, bool or None
+        The value of the card.
+    """
+    value = value.strip()
+    if value.startswith("'"):
+        # Quotes inside strings are written as two quotes
+        text = ""
+        i = 1
+        while i < len(value):
+            if value[i] == "'":
+                if value[i + 1 : i + 2] == "'":
+                    text += "'"
+                    i += 2
+                    continue
+                break
+            text += value[i]
+            i += 1
+        return text.rstrip()
+
+    value = value.split("/")[0].strip()
+    if value == "T":
+        return True
+    if value == "F":
+        return False
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value.replace("D", "E"))
+    except ValueError:
+        return value
+
+
+def parse_header(data: bytes) -> Dict[str, HeaderValue]:
+    """
+    Parse header cards until the END card.
+
+    Parameters
+    ----------
+    data : bytes
+        Header blocks.
+
+    Returns
+    -------
+    dict
+        Keys are the keywords and the values their values.
+    """
+    header: Dict[str, HeaderValue] = {}
+    for start in range(0, len(data), CARD_SIZE):
+        card = data[start : start + CARD_SIZE].decode("ascii", errors="replace")
+        keyword = card[:8].strip()
+        if keyword == "END":
+            return header
+        if card[8:10] == "= ":
+            header[keyword] = parse_value(card[10:])
+
+    raise FitsHeaderError("Header has no END card")
+
+
+def _read_header(stream: ByteStream) -> Dict[str, HeaderValue]:
+    data = b""
+    while True:
+        block = stream.read(BLOCK_SIZE)
+        data += block
+        for start in range(0, BLOCK_SIZE, CARD_SIZE):
+            if block[start : start + 8] == b"END     ":
+                return parse_header(data)
+
+
+def data_size(header: Dict[str, HeaderValue]) -> int:
+    """
+    Return the number of bytes of the data which follows a header, with padding.
+    """
+    naxis = int(header.get("NAXIS", 0) or 0)
+    if naxis == 0:
+        return 0
+
+    bitpix = abs(int(header["BITPIX"] or 0))
+    n_values = 1
+    for i in range(1, naxis + 1):
+        n_values *= int(header[f"NAXIS{i}"] or 0)
+    pcount = int(header.get("PCOUNT", 0) or 0)
+    gcount = int(header.get("GCOUNT", 1) or 1)
+    size = bitpix // 8 * gcount * (pcount + n_values)
+
+    return math.ceil(size / BLOCK_SIZE) * BLOCK_SIZE
+
+
+def read_header(url: str, hdu: int = 1) -> Dict[str, HeaderValue]:
+    """
+    Read the header of an HDU of a remote FITS file.
+
+    Only the bytes up to and including the header are downloaded. A FITS file
+    consists of header data units (HDUs). Each header is a sequence of 80 character
+    cards, which ends with an END card and is padded to a multiple of 2880 bytes.
+    The size of the data after a header follows from the header, so the data of the
+    preceding HDUs can be skipped. Gzip compressed files are decompressed on the
+    fly.
+
+    Parameters
+    ----------
+    url : str
+        URL of the, optionally gzip compressed, FITS file.
+    hdu : int
+        Index of the HDU, where 0 is the primary HDU.
+
+    Returns
+    -------
+    dict
+        Keys are the keywords and the values their values.
+
+    See Also
+    --------
+    https://fits.gsfc.nasa.gov/fits_standard.html
+    """
+    reader = RangeReader(url)
+    try:
+        stream = ByteStream(reader)
+        for _ in range(hdu):
+            stream.skip(data_size(_read_header(stream)))
+        header = _read_header(stream)
+    finally:
+        reader.close()
+
+    logging.info(f"Read header {hdu} of {url} with {reader.bytes_received} bytes.")
+
+    return header
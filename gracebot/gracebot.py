@@ -1,25 +1,55 @@
+import asyncio
 import logging
-from collections import Counter, defaultdict
-import aiogram
+import math
+from datetime import datetime, timedelta
+from typing import Optional, Set, Tuple
+
 from aiogram import Bot, types
+from aiogram.utils import exceptions
 from aiogram.utils.emoji import emojize
 
-from detector import Detector
-from gwevents import Events, time_ago
-from keyboard import InlineKeyboard
+from broadcast import Broadcaster
+from callbackrouter import CallbackRouter
+from detector import DetectorStatusBoard
+from detectorhistory import DetectorHistory
+from fileidcache import FileIdCache
+from gwevents import AsyncEvents, Events, time_ago
+from imageprefetch import ImagePrefetcher
+from keyboard import EventPages, event_prefix, page_prefix, parse_page_payload
 from permanentset import PermanentSet
+from subscriberprefs import Preferences, SubscriberPreferences, alert_kinds
+from ttlcache import TTLCache
 
 
 class GraceBot(Bot):
     def __init__(self, token: str):
         super().__init__(token=token)
         self.events: Events = Events()
-        self.events.update_all()
-        self.event_keyboards: dict = defaultdict(InlineKeyboard)
+        self.events_async: AsyncEvents = AsyncEvents(self.events)
+        self.image_prefetcher: ImagePrefetcher = ImagePrefetcher(self.events_async)
+        self.event_pages: EventPages = EventPages(self.events, rows=4, columns=2)
+        self.callback_router: CallbackRouter = CallbackRouter()
+        self.callback_router.register(event_prefix, self.select_event)
+        self.callback_router.register(page_prefix, self.turn_event_page)
+        # Offset of the last event page each chat viewed
+        self.last_event_pages: TTLCache = TTLCache(max_size=1024, ttl=3600)
         self.new_event_messages_send: PermanentSet = PermanentSet(
             "new_event_messages_send.txt", str
         )
+        # Events whose preliminary notice is being handled right now
+        self._preliminaries_in_progress: Set[str] = set()
         self.subscribers: PermanentSet = PermanentSet("subscribers.txt", int)
+        self.preferences: SubscriberPreferences = SubscriberPreferences(
+            "subscriber_preferences.json"
+        )
+        self.broadcaster: Broadcaster = Broadcaster()
+        self.file_ids: FileIdCache = FileIdCache("file_ids.json")
+        self._upload_lock = asyncio.Lock()
+        self.detector_history: DetectorHistory = DetectorHistory()
+        self.detector_board: DetectorStatusBoard = DetectorStatusBoard(
+            history=self.detector_history
+        )
+        asyncio.get_event_loop().create_task(self.detector_board.run())
         self.event_types: dict = {
             # Probability that the source is a binary black hole merger (both
             # objects heavier than 5 solar masses)
@@ -43,47 +73,95 @@ class GraceBot(Bot):
         event_id = event_id_from_message(message)
         logging.info(f"Event to update from preliminary message: {event_id}")
 
-        if event_id in self.new_event_messages_send.data:
+        if (
+            event_id in self.new_event_messages_send.data
+            or event_id in self._preliminaries_in_progress
+        ):
             return
-        else:
-            self.events.update_events_last_week()
+
+        # Mark the event as in progress while awaiting the update, so a second
+        # preliminary notice which arrives in the meantime isn't send as well. It
+        # is only saved as send once the update succeeded, so a later notice can
+        # retry if the update fails.
+        self._preliminaries_in_progress.add(event_id)
+        try:
+            self.image_prefetcher.prefetch(event_id)
+            await self.events_async.update_events_last_week()
             self.new_event_messages_send.add(event_id)
+        finally:
+            self._preliminaries_in_progress.discard(event_id)
 
         text = f"A new event has been measured!\n\n"
-        await self._send_event_info_to_all_users(event_id, text)
+        await self._send_event_info_to_all_users(event_id, text, "preliminary")
 
     async def send_update(self, message):
         event_id = event_id_from_message(message)
-        self.events.update_single(event_id)
+        self.image_prefetcher.prefetch(event_id)
+        await self.events_async.update_single(event_id)
 
         text = f"Event {event_id} has been updated.\n\n"
-        await self._send_event_info_to_all_users(event_id, text)
+        await self._send_event_info_to_all_users(event_id, text, "update")
 
     async def send_retraction(self, message):
         event_id = event_id_from_message(message)
         text = f"Event {event_id} has been retracted. The event details were:\n\n"
 
-        await self._send_event_info_to_all_users(event_id, text)
+        await self._send_event_info_to_all_users(event_id, text, "retraction")
+
+        await self.events_async.update_single(event_id)
+
+    async def _send_event_info_to_all_users(
+        self, event_id: str, pre_text: str, kind: str
+    ) -> None:
+        await self.image_prefetcher.wait(event_id)
+        event_info = await self.render_event_info(event_id, pre_text)
+        if event_info is None:
+            return
+        text, picture = event_info
 
-        self.events.update_all()
+        async def deliver(chat_id: int) -> None:
+            await self.broadcaster.send(
+                chat_id, self.send_message, text, parse_mode="markdown"
+            )
+            if picture:
+                await self.broadcaster.send(chat_id, self._send_picture, picture)
+
+        recipients = self._recipients(event_id, kind)
+        report = await self.broadcaster.broadcast(recipients, deliver)
+        logging.info(
+            f"Event {event_id}: {report}, "
+            f"{len(self.subscribers.data) - len(recipients)} filtered out"
+        )
 
-    async def _send_event_info_to_all_users(self, event_id: str, pre_text: str) -> None:
-        for user_id in self.subscribers.data:
-            try:
-                await self.send_event_info(user_id, event_id, pre_text)
-            except aiogram.utils.exceptions.BotBlocked:
-                logging.info(f"User {user_id} has blocked the bot.")
-                continue
+    def _recipients(self, event_id: str, kind: str) -> set:
+        """
+        Return the subscribers whose preferences match an alert of an event.
+        """
+        event = self.events.data.get(event_id)
+        if event is None:
+            return self.preferences.recipients(self.subscribers.data, kind)
+
+        probability = None
+        if event.most_likely is not None:
+            probability = event.event_types.get(event.most_likely)
+
+        return self.preferences.recipients(
+            self.subscribers.data,
+            kind,
+            event_type=event.most_likely,
+            probability=probability,
+            distance_mly=event.distance_mean_Mly,
+        )
 
     async def send_event_info(
-        self, chat_id: str, event_id: str, pre_text: str = ""
+        self, chat_id: int, event_id: str, pre_text: str = ""
     ) -> None:
         """
         Send information of a specific event to the user.
 
         Parameters
         ----------
-        chat_id : str
+        chat_id : int
             Where to send the message to.
         event_id : str
             The event to send the information about.
@@ -94,45 +172,111 @@ class GraceBot(Bot):
         -------
         None
         """
+        event_info = await self.render_event_info(event_id, pre_text)
+        if event_info is None:
+            return
+        text, picture = event_info
+
+        await self.send_message(chat_id, text, parse_mode="markdown")
+        if picture:
+            await self._send_picture(chat_id, picture)
+
+    async def render_event_info(
+        self, event_id: str, pre_text: str = ""
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Create the message text and get the image with information of an event.
+
+        Parameters
+        ----------
+        event_id : str
+            The event to send the information about.
+        pre_text : str
+            Will be added to the beginning of the message.
+
+        Returns
+        -------
+        Tuple[str, str] or None
+            Message text and the local path of the event image, which is empty if
+            there is no image. None if the event doesn't exist.
+        """
         try:
             event = self.events.data[event_id]
         except KeyError:
             logging.error(f"Warning couldn't find event with id {event_id}")
-            return
+            return None
 
         link = f"https://gracedb.ligo.org/superevents/{event_id}/view/"
-        text = (
-            pre_text + f"*{event_id.upper()}*\n" + f"{time_ago(event['created'])}\n\n"
-        )
-
-        try:
-            event_type = self.events.get_likely_event_type(event_id)
-            confidence = self.events.data[event_id]["event_types"][event_type]
+        text = pre_text + f"*{event_id.upper()}*\n" + f"{time_ago(event.created)}\n\n"
+
+        event_type = self.events.get_likely_event_type(event_id)
+        distance_mean_mly = event.distance_mean_Mly
+        distance_std_mly = event.distance_std_Mly
+        if (
+            event_type in event.event_types
+            and distance_mean_mly is not None
+            and distance_std_mly is not None
+        ):
+            confidence = event.event_types[event_type]
             text += (
                 f"Unconfirmed {self.event_types[event_type]} ({confidence:.2%}) event."
             )
 
-            distance_mean = round(event["distance_mean_Mly"] / 1000, 2)
-            distance_std = round(event["distance_std_Mly"] / 1000, 2)
+            distance_mean = round(distance_mean_mly / 1000, 2)
+            distance_std = round(distance_std_mly / 1000, 2)
             text = (
                 text[:-1] + f" at {distance_mean} ± {distance_std} billion light years."
             )
 
-            instruments = self.events.data[event_id]["instruments_long"]
+            instruments = event.instruments_long
             text += f" The event was measured by {inline_list(instruments)}."
-        except KeyError:
-            pass
 
         text += f"\n\n[Event page]({link})"
 
-        await self.send_message(chat_id, text, parse_mode="markdown")
-
         try:
-            with open(self.events.picture(event_id), "rb") as picture:
-                await self.send_photo(chat_id, picture)
+            picture = await self.events_async.picture(event_id)
         except FileNotFoundError:
             logging.error("Couldn't find the event image")
-            return None
+            picture = ""
+
+        return text, picture
+
+    async def _send_picture(self, chat_id: int, picture: str) -> None:
+        """
+        Send an image, uploading it only if it wasn't uploaded to Telegram before.
+
+        Parameters
+        ----------
+        chat_id : int
+            Where to send the image to.
+        picture : str
+            Local path of the image.
+
+        Returns
+        -------
+        None
+        """
+        file_id = self.file_ids.get(picture)
+        if file_id is None:
+            # Let concurrent sends of a broadcast wait for the first upload, so the
+            # image is uploaded only once.
+            async with self._upload_lock:
+                file_id = self.file_ids.get(picture)
+                if file_id is None:
+                    await self._upload_picture(chat_id, picture)
+                    return
+
+        try:
+            await self.send_photo(chat_id, file_id)
+        except exceptions.WrongFileIdentifier:
+            logging.warning(f"Telegram doesn't know the file id of {picture} anymore.")
+            self.file_ids.remove(picture)
+            await self._upload_picture(chat_id, picture)
+
+    async def _upload_picture(self, chat_id: int, picture: str) -> None:
+        with open(picture, "rb") as photo:
+            message = await self.send_photo(chat_id, photo)
+        self.file_ids.add(picture, message.photo[-1].file_id)
 
     async def send_welcome_message(self, message: types.Message) -> None:
         """
@@ -155,7 +299,9 @@ class GraceBot(Bot):
             "messages.\n"
             "\n"
             "Furthermore you can check out the /latest event, or select a past /event. "
-            "Use /stats to see and overview of all O3 events or view the live detector /status."
+            "Use /stats to see and overview of all O3 events or view the live detector /status "
+            "and the /uptime of the detectors. Choose which alerts you receive with "
+            "/filter."
         )
 
         await self.send_message(message.chat.id, text)
@@ -173,14 +319,10 @@ class GraceBot(Bot):
         -------
         None.
         """
-        event_id = list(self.events.latest)[0]
+        event_id = next(iter(self.events.latest), "")
 
         await self.send_event_info(message.chat.id, event_id)
 
-    @property
-    def event_keys(self) -> list:
-        return [f"{id}_{info['most_likely']}" for id, info in self.events.data.items()]
-
     async def send_event_selector(self, message: types.Message) -> None:
         """
         User can select any event from the O3 run and get a message with the details.
@@ -193,17 +335,15 @@ class GraceBot(Bot):
         -------
         None
         """
-        self.event_keyboards[message.chat.id] = InlineKeyboard(
-            self.event_keys, rows=4, columns=2
-        )
+        offset = self.last_event_pages.get(message.chat.id, 0)
 
         await self.send_message(
             chat_id=message.chat.id,
             text="Select the event you want to see the details of.",
-            reply_markup=self.event_keyboards[message.chat.id],
+            reply_markup=self.event_pages.page(offset),
         )
 
-    async def event_selector_callback_handler(self, query: types.CallbackQuery) -> None:
+    async def select_event(self, query: types.CallbackQuery, event_id: str) -> None:
         """
         This is called when the user presses a button to select an event.
 
@@ -212,6 +352,8 @@ class GraceBot(Bot):
         query : types.CallbackQuery
             Callback query which contains info on which message the InlineKeyboard is
             attached to.
+        event_id : str
+            The selected event.
 
         Returns
         -------
@@ -219,16 +361,40 @@ class GraceBot(Bot):
         """
         await query.answer()  # send answer to close the rounding circle
 
-        answer_data = query.data
-        logging.debug(f"answer_data={answer_data}")
+        if event_id not in self.events.data:
+            logging.warning(f"Selected event {event_id} doesn't exist (anymore).")
+            return
 
-        user_id = query.from_user.id
-        valid_event_ids = self.event_keyboards[user_id].visible_keys
-        if answer_data in valid_event_ids:
-            event_id, _ = answer_data.split("_")
-            await self.send_event_info(user_id, event_id)
-        else:
-            await self.event_keyboards[user_id].update(query)
+        await self.send_event_info(query.from_user.id, event_id)
+
+    async def turn_event_page(self, query: types.CallbackQuery, payload: str) -> None:
+        """
+        This is called when the user presses a button to go to another page of events.
+
+        Parameters
+        ----------
+        query : types.CallbackQuery
+            Callback query which contains info on which message the InlineKeyboard is
+            attached to.
+        payload : str
+            Version of the events and offset of the page.
+
+        Returns
+        -------
+        None
+        """
+        await query.answer()  # send answer to close the rounding circle
+
+        try:
+            version, offset = parse_page_payload(payload)
+        except ValueError:
+            logging.warning(f"Invalid event page {payload}")
+            return
+
+        self.last_event_pages.set(query.message.chat.id, offset)
+        await query.message.edit_reply_markup(
+            reply_markup=self.event_pages.page(offset, version)
+        )
 
     async def send_o3_stats(self, message: types.Message) -> None:
         """
@@ -246,9 +412,8 @@ class GraceBot(Bot):
         # TODO take confirmed from other source since it will not be updated
         # in graceDB if they are confirmed. For that use:
         # https://www.gw-openscience.org/catalog/GWTC-1-confident/html/
-        event_counter = Counter(
-            [info["most_likely"] for info in self.events.data.values()]
-        )
+        stats = self.events.stats
+        event_counter = stats.event_types
 
         unconfirmed_bbh = event_counter["BBH"]
         unconfirmed_bns = event_counter["BNS"]
@@ -257,7 +422,7 @@ class GraceBot(Bot):
         terrestrial = event_counter["Terrestrial"]
 
         text = (
-            f"Observational run 3 has detected *{len(self.events.data)}* "
+            f"Observational run 3 has detected *{stats.total}* "
             "events since April 1st 2019.\n\n"
             ""
             "*Event types*\n"
@@ -268,6 +433,28 @@ class GraceBot(Bot):
             f"Likely terrestrial (false alarm): *{terrestrial}*.\n"
         )
 
+        distances = []
+        for event_type, name in self.event_types.items():
+            distance = stats.distance(event_type)
+            if distance is not None and event_type != "Terrestrial":
+                distances.append(
+                    f"{name.capitalize()}: *{distance.mean / 1000:.2f}* "
+                    f"({distance.min / 1000:.2f} - {distance.max / 1000:.2f}).\n"
+                )
+        if distances:
+            text += "\n*Mean distance in billion light years*\n" + "".join(distances)
+
+        detector_counts = sorted(
+            stats.detector_counts().items(), key=lambda item: item[1], reverse=True
+        )
+        detectors = [
+            f"{inline_list(list(combination))}: *{count}*.\n"
+            for combination, count in detector_counts
+            if len(combination) > 0
+        ]
+        if detectors:
+            text += "\n*Measured by*\n" + "".join(detectors)
+
         await self.send_message(message.chat.id, text, parse_mode="markdown")
 
     async def send_detector_status(self, message: types.Message) -> None:
@@ -283,10 +470,10 @@ class GraceBot(Bot):
         -------
         None
         """
-        detectors = [Detector("Hanford"), Detector("Livingston"), Detector("Virgo")]
+        snapshot = await self.detector_board.get_snapshot()
 
         detector_status = []
-        for detector in detectors:
+        for detector in snapshot.detectors:
             hours = detector.status_duration.days * 24 + (
                 detector.status_duration.seconds // 3600
             )
@@ -296,10 +483,54 @@ class GraceBot(Bot):
                 f"{emojize(detector.status_icon)} {detector.name}: "
                 f"{detector.status} {hours}h {minutes}m"
             )
+        if self.detector_board.is_stale(snapshot):
+            detector_status.append(
+                f"\nLast updated {snapshot.retrieved:%Y-%m-%d %H:%M}, "
+                "the status page can't be reached."
+            )
         text = "\n".join(detector_status)
 
         await self.send_message(message.chat.id, text)
 
+    async def send_detector_uptime(self, message: types.Message) -> None:
+        """
+        Send the duty cycle of the detectors and the network over the last week.
+
+        Parameters
+        ----------
+        message : types.Message
+            The message send by the user.
+
+        Returns
+        -------
+        None
+        """
+        snapshot = await self.detector_board.get_snapshot()
+        start = datetime.now() - timedelta(weeks=1)
+        history = self.detector_history
+
+        text = ["Observing time in the last 7 days"]
+        detectors = [detector.name for detector in snapshot.detectors]
+        for detector in detectors:
+            text.append(
+                f"{detector}: {percentage(history.duty_cycle(detector, start))}"
+            )
+        text.append(
+            f"All detectors: "
+            f"{percentage(history.network_uptime(start, detectors=detectors))}"
+        )
+
+        stretch = history.longest_stretch(start, detectors=detectors)
+        if stretch is not None:
+            hours = stretch.duration.days * 24 + stretch.duration.seconds // 3600
+            minutes = (stretch.duration.seconds % 3600) // 60
+            text.append(
+                f"Longest stretch with all detectors: {hours}h {minutes}m, "
+                f"ending {time_ago(stretch.end.astimezone())}"
+            )
+
+        await self.send_message(message.chat.id, "\n".join(text))
+
     async def add_subscriber(self, message: types.Message) -> None:
         """
         Add the user from the message to the subscriber list.
@@ -340,10 +571,113 @@ class GraceBot(Bot):
             await self.send_message(user_id, "You are not subscribed.")
         else:
             self.subscribers.remove(message.chat.id)
+            self.preferences.remove(message.chat.id)
             await self.send_message(
                 user_id, "You will no longer receive the latest event updates."
             )
 
+    async def set_preferences(self, message: types.Message) -> None:
+        """
+        Show or change which alerts a subscriber receives.
+
+        Parameters
+        ----------
+        message : aiogram.types.Message
+            The message send by the user, for example '/filter types BBH BNS'.
+
+        Returns
+        -------
+        None.
+        """
+        user_id = message.chat.id
+        args = message.get_args().split()
+        try:
+            if len(args) > 0:
+                prefs = update_preferences(self.preferences.get(user_id), args)
+                self.preferences.set(user_id, prefs)
+        except ValueError as e:
+            await self.send_message(user_id, f"{e}\n\n{filter_usage}")
+            return
+
+        prefs = self.preferences.get(user_id)
+        distance = (
+            f"up to {prefs.max_distance_mly:.0f} million light years"
+            if prefs.max_distance_mly is not None
+            else "at any distance"
+        )
+        text = (
+            f"You receive {inline_list(sorted(prefs.alert_kinds))} alerts of "
+            f"{inline_list(sorted(prefs.event_types))} events with at least "
+            f"{prefs.min_probability:.0%} probability, {distance}.\n\n{filter_usage}"
+        )
+        await self.send_message(user_id, text)
+
+
+filter_usage = (
+    "Change what you receive with\n"
+    "/filter types BNS NSBH BBH MassGap Terrestrial\n"
+    "/filter probability 50 (minimum probability in percent)\n"
+    "/filter distance 5000 (maximum distance in million light years, or 'any')\n"
+    "/filter alerts preliminary update retraction\n"
+    "/filter reset"
+)
+
+
+def update_preferences(prefs: Preferences, args: list) -> Preferences:
+    """
+    Change preferences according to the arguments of the /filter command.
+
+    Parameters
+    ----------
+    prefs : Preferences
+        Current preferences.
+    args : list of str
+        Name of the setting followed by its values, or just 'reset'.
+
+    Returns
+    -------
+    Preferences
+        The changed preferences.
+
+    Raises
+    ------
+    ValueError
+        If the arguments are invalid.
+    """
+    setting, values = args[0].lower(), args[1:]
+    if setting == "reset":
+        return Preferences()
+    if len(values) == 0:
+        raise ValueError(f"No value given for {setting}.")
+
+    if setting == "types":
+        known = {t.lower(): t for t in Preferences().event_types}
+        try:
+            return prefs._replace(
+                event_types=frozenset(known[v.lower()] for v in values)
+            )
+        except KeyError as e:
+            raise ValueError(f"Unknown event type {e}.")
+    elif setting == "alerts":
+        kinds = frozenset(v.lower() for v in values)
+        if not kinds <= set(alert_kinds):
+            raise ValueError(f"Unknown alert kind {sorted(kinds - set(alert_kinds))}.")
+        return prefs._replace(alert_kinds=kinds)
+    elif setting == "probability":
+        probability = float(values[0].rstrip("%")) / 100
+        if not 0 <= probability <= 1:
+            raise ValueError("The probability should be between 0 and 100.")
+        return prefs._replace(min_probability=probability)
+    elif setting == "distance":
+        if values[0].lower() == "any":
+            return prefs._replace(max_distance_mly=None)
+        distance = float(values[0])
+        if not (math.isfinite(distance) and distance >= 0):
+            raise ValueError("The distance should be a positive number.")
+        return prefs._replace(max_distance_mly=distance)
+
+    raise ValueError(f"Unknown setting {setting}.")
+
 
 def event_id_from_message(message: types.Message) -> str:
     """
@@ -366,6 +700,16 @@ def event_id_from_message(message: types.Message) -> str:
     return event_id
 
 
+def percentage(fraction: float) -> str:
+    """
+    Format a fraction as a percentage, or 'no data' if it is NaN.
+    """
+    if fraction != fraction:
+        return "no data"
+
+    return f"{fraction:.0%}"
+
+
 def inline_list(items):
     if len(items) == 0:
         return ""
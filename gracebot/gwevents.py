@@ -2,26 +2,98 @@ import asyncio
 import datetime
 import logging
 import urllib.error
+import threading
 import time
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 import dateutil.parser
 import ligo.gracedb.exceptions
 import timeago
 from ligo.gracedb.rest import GraceDb
 
-from image import ImageFromUrl
+from catalogue import CatalogueStats
+from diskcache import DiskCache
+from eventtable import EventTable
+from eventstore import EventStore
+from imagecache import ImageCache
+from imagepool import ImagePool
+from ratelimiter import HostRateLimiter
+from superevent import SuperEvent
+from syncstate import SyncState
+from timeindex import TimeIndex
+from ttlcache import TTLCache
 from voevent import VOEvent, VOEventFromEventId
 
+# Fields of a superevent which are taken from its VOEvent
+voevent_keys = (
+    "distance_mean_Mly",
+    "distance_std_Mly",
+    "event_types",
+    "most_likely",
+    "instruments_short",
+    "instruments_long",
+)
+
 
 class Events(object):
     """
     A dictionary with all superevents from the Grace database.
+
+    Parameters
+    ----------
+    max_workers : int
+        Maximum number of events which are enriched with their VOEvent info at the
+        same time.
+    requests_per_second : float
+        Maximum number of requests per second to a single host during enrichment.
+    sync_file : str
+        File in which the sync state with the Grace database is saved.
+    store_file : str
+        SQLite database in which the events are saved. Stored events are loaded on
+        start up and are synced with the Grace database in the background.
+    cache_dir : str
+        Directory in which the VOEvents are cached.
+    image_dir : str
+        Directory in which the processed event images are cached.
     """
 
-    def __init__(self):
+    # Updates of existing events are expected within this period after they were
+    # created. Older events are only updated through update alerts.
+    sync_lookback = datetime.timedelta(weeks=1)
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        requests_per_second: float = 10.0,
+        sync_file: str = "event_sync.json",
+        store_file: str = "events.sqlite",
+        cache_dir: str = "gracebot/cache/voevents",
+        image_dir: str = "gracebot/img",
+    ):
         self.client = GraceDb()
-        self.data = {}
+        self.store = EventStore(store_file)
+        self.data = self.store.load()
+        # Incremented every time `data` is replaced
+        self.version = 0
+        self.stats = CatalogueStats(self.data)
+        self.time_index = TimeIndex(self.data)
+        self._table = EventTable(self.data, self.version)
+        logging.info(f"Loaded {len(self.data)} events from {store_file}.")
+        self.max_workers = max_workers
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.voevent_cache = DiskCache(cache_dir)
+        self.sync_state = SyncState(sync_file)
+        # File list and best image url per event, which are needed every time the
+        # event info is send.
+        self.file_lists = TTLCache(max_size=256, ttl=600)
+        self.image_pool = ImagePool(ImageCache(image_dir))
+        # Updates can run in several threads at the same time. This lock guards
+        # replacing `data` and changing the sync state.
+        self._lock = threading.RLock()
+        # Saving the changes to disk happens outside `_lock`, so readers don't
+        # wait for it. This lock keeps the saves in the order of the changes.
+        self._save_lock = threading.Lock()
         self.loop = asyncio.get_event_loop()
         self.loop.create_task(self._periodic_event_updater())
 
@@ -37,30 +109,90 @@ class Events(object):
         --------
         https://gracedb.ligo.org/latest/
         """
-        events = self.client.superevents(query="-ADVNO", orderby=["-created"])
-        self.data = {}
+        events = list(self.client.superevents(query="-ADVNO", orderby=["-created"]))
 
-        logging.info("Updating all events. This might take a minute.")
+        logging.info(
+            f"Updating all events with {self.max_workers} workers. "
+            "This might take a minute."
+        )
         start = time.time()
-        for i, event in enumerate(events, 1):
-            self._add_to_event_data(event)
+        with self._lock:
+            self.sync_state.clear()
+        data: Dict[str, SuperEvent] = {}
+        for event_id, event in self._enrich(events):
+            data[event_id] = event
+        stats = CatalogueStats(data)
+        time_index = TimeIndex(data)
+        with self._save_lock:
+            with self._lock:
+                self.data = data
+                self.stats = stats
+                self.time_index = time_index
+                self.version += 1
+                sync_state = self.sync_state.to_dict()
+            self.store.replace_all(data)
+            self.sync_state.save(sync_state)
 
         end = time.time()
-        logging.info(f"Updating {i} events took {round(end - start, 2)} s.")
+        logging.info(f"Updating {len(events)} events took {round(end - start, 2)} s.")
+
+    def sync(self):
+        """
+        Get only the events which are new or changed since the last update.
+
+        Only superevents created within `sync_lookback` before the newest known
+        event are requested. Of those, only events which have a new VOEvent are
+        enriched again. Falls back to `update_all` if there is nothing to sync
+        against.
+
+        Returns
+        -------
+        None
+        """
+        newest = self.sync_state.newest_created
+        if newest is None or len(self.data) == 0:
+            self.update_all()
+            return
+
+        since = newest - self.sync_lookback
+        logging.info(f"Syncing events created since {since:%Y-%m-%d}.")
+        start = time.time()
+        events = list(
+            self.client.superevents(
+                query=f"created: {since:%Y-%m-%d} .. now -ADVNO", orderby=["-created"]
+            )
+        )
+
+        synced = dict(self._enrich(events))
+        retracted = [
+            event_id
+            for event_id, event in self.data.items()
+            if event.created >= since and event_id not in synced
+        ]
+        for event_id in retracted:
+            logging.info(f"Removing retracted event {event_id}")
+        self._publish(synced, retracted)
+
+        end = time.time()
+        logging.info(f"Syncing {len(events)} events took {round(end - start, 2)} s.")
 
     def update_events_last_week(self):
         logging.info("Updating all events until 1 week ago. This might take a minute.")
         start = time.time()
-        events = self.client.superevents(
-            query="created: 1 week ago .. now -ADVNO", orderby=["-created"]
+        events = list(
+            self.client.superevents(
+                query="created: 1 week ago .. now -ADVNO", orderby=["-created"]
+            )
         )
 
-        for i, event in enumerate(events, 1):
-            logging.info(f"Updating event {event['superevent_id']}")
-            self._add_to_event_data(event)
+        updated = {}
+        for event_id, event in self._enrich(events):
+            logging.info(f"Updating event {event_id}")
+            updated[event_id] = event
+        self._publish(updated)
 
         end = time.time()
-        logging.info(f"Updating {i} events took {round(end - start, 2)} s.")
+        logging.info(f"Updating {len(events)} events took {round(end - start, 2)} s.")
 
     def update_single(self, event_id: str):
         """
@@ -89,44 +221,150 @@ class Events(object):
             f"Updating single event from database took {round(end - start, 2)} s."
         )
 
-        self._add_to_event_data(event)
+        if "ADVNO" in event.get("labels", []):
+            logging.info(f"Event {_event_id} is retracted.")
+            self._publish({}, [_event_id])
+        else:
+            event_id, event = self._to_event_data(
+                event, self._get_voevent(event["superevent_id"])
+            )
+            self._publish({event_id: event})
+
+    def _publish(
+        self, updated: Dict[str, SuperEvent], removed: Sequence[str] = ()
+    ) -> None:
+        """
+        Apply updated and removed events and save them.
+
+        The changes are made on a copy of the event dictionary, which then replaces
+        `data` at once. Readers on other threads therefore never see a dictionary
+        which is changing while they iterate over it. The time index is replaced
+        at the same time, so the order of the events doesn't depend on the order
+        of `data`. Concurrent updates are applied one after another. The changes
+        are saved after they are published, so readers don't wait for the disk.
 
-    def _add_to_event_data(self, event):
-        event_id = event.pop("superevent_id")
-        event["created"] = dateutil.parser.parse(event["created"])
-        self.data[event_id] = event
+        Parameters
+        ----------
+        updated : dict
+            New or updated events.
+        removed : sequence of str
+            Ids of the events to remove.
+
+        Returns
+        -------
+        None
+        """
+        with self._save_lock:
+            with self._lock:
+                data = dict(self.data)
+                data.update(updated)
+                for event_id in removed:
+                    data.pop(event_id, None)
+                    self.sync_state.forget(event_id)
+                self.data = data
+                self.time_index = self.time_index.updated(updated, removed)
+                self.version += 1
+                for event_id, event in updated.items():
+                    self.stats.add(event_id, event)
+                for event_id in removed:
+                    self.stats.remove(event_id)
+                sync_state = self.sync_state.to_dict()
+
+            self.store.save(updated)
+            self.store.remove(removed)
+            self.sync_state.save(sync_state)
+
+        for event_id in list(updated) + list(removed):
+            self.invalidate_files(event_id)
+
+    def _enrich(self, events: List[dict]) -> Iterator[Tuple[str, SuperEvent]]:
+        """
+        Add the VOEvent info to superevents, using a pool of worker threads.
 
-        self._add_event_info_from_voevent(event_id)
+        The VOEvents are downloaded concurrently, but the events are yielded in the
+        same order as `events`. Events which have no new VOEvent since they were
+        last synced keep their current VOEvent info.
 
-    def _add_event_info_from_voevent(self, event_id: str):
-        voevent = VOEventFromEventId()
+        Parameters
+        ----------
+        events : list of dict
+            Superevents as returned by the Grace database.
+
+        Returns
+        -------
+        Iterator[Tuple[str, SuperEvent]]
+            Event id and the enriched event.
+        """
+        event_ids = [event["superevent_id"] for event in events]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            voevents = executor.map(self._get_voevent, event_ids)
+            for event, voevent in zip(events, voevents):
+                yield self._to_event_data(event, voevent)
+
+    def _to_event_data(
+        self, event: dict, voevent: Optional[VOEventFromEventId]
+    ) -> Tuple[str, SuperEvent]:
+        """
+        Make the record of a superevent from the Grace database and its VOEvent.
+
+        Only the fields which the bot uses are kept from the superevent. If there
+        is no newer VOEvent, or it couldn't be read, the known VOEvent info of the
+        event is kept.
+        """
+        event_id = event["superevent_id"]
+        created = dateutil.parser.parse(event["created"])
+        info: dict = {}
+
+        if voevent is not None and voevent.revision > self._known_revision(event_id):
+            self._add_event_distance(info, voevent)
+            self._add_event_classification(info, voevent)
+            self._add_instruments(info, voevent)
+        elif event_id in self.data:
+            old_event = self.data[event_id]
+            info.update({key: getattr(old_event, key) for key in voevent_keys})
+
+        if voevent is not None:
+            with self._lock:
+                self.sync_state.seen(event_id, created, voevent.revision)
+
+        return event_id, SuperEvent(created, **info)
+
+    def _known_revision(self, event_id: str) -> int:
+        if event_id not in self.data:
+            return 0
+
+        return self.sync_state.revisions.get(event_id, 0)
+
+    def _get_voevent(self, event_id: str) -> Optional[VOEventFromEventId]:
+        voevent = VOEventFromEventId(self.rate_limiter, self.voevent_cache)
         try:
-            voevent.get(event_id)
-            self._add_event_distance(voevent)
-            self._add_event_classification(voevent)
-            self._add_instruments(voevent)
+            voevent.get_newer(event_id, self._known_revision(event_id))
         except (ligo.gracedb.exceptions.HTTPError, urllib.error.HTTPError) as e:
             logging.warning(
                 f"Couldn't get info from VOEvent file with event id {event_id}"
                 f"Exception: {e}"
             )
+            return None
+
+        return voevent
 
-    def _add_event_distance(self, voevent: VOEvent):
+    def _add_event_distance(self, event: dict, voevent: VOEvent):
         """
         Add distance and its standard deviation to the event dictionary.
 
         Parameters
         ----------
+        event : dict
         voevent : VOEvent
 
         Returns
         -------
         None
         """
-        self.data[voevent.id]["distance_mean_Mly"] = voevent.distance
-        self.data[voevent.id]["distance_std_Mly"] = voevent.distance_std
+        event["distance_mean_Mly"] = voevent.distance
+        event["distance_std_Mly"] = voevent.distance_std
 
-    def _add_event_classification(self, voevent: VOEvent):
+    def _add_event_classification(self, event: dict, voevent: VOEvent):
         """
         Adds the event type to the events dictionary.
 
@@ -137,26 +375,30 @@ class Events(object):
         -------
         None
         """
-        self.data[voevent.id]["event_types"] = voevent.p_astro
-        self.data[voevent.id]["most_likely"] = self.get_likely_event_type(voevent.id)
+        event["event_types"] = voevent.p_astro
+        event["most_likely"] = most_likely_event_type(voevent.p_astro)
 
-    def _add_instruments(self, voevent: VOEvent):
+    def _add_instruments(self, event: dict, voevent: VOEvent):
         """
 
         Parameters
         ----------
-        voevent
+        event : dict
+        voevent : VOEvent
 
         Returns
         -------
 
         """
-        self.data[voevent.id]["instruments_short"] = voevent.seen_by_short
-        self.data[voevent.id]["instruments_long"] = voevent.seen_by_long
+        event["instruments_short"] = voevent.seen_by_short
+        event["instruments_long"] = voevent.seen_by_long
 
     async def _periodic_event_updater(self):
         """
-        Fetches all the events from the GraceDB database.
+        Syncs the events with the GraceDB database on start up and every 10 hours.
+
+        The sync runs in a separate thread, so the bot can serve the stored events
+        in the meantime.
 
         Returns
         -------
@@ -164,10 +406,13 @@ class Events(object):
 
         """
         while True:
-            await asyncio.sleep(delay=36000)
-
             logging.info("Refreshing event database.")
-            self.update_all()
+            try:
+                await self.loop.run_in_executor(None, self.sync)
+            except Exception as e:
+                logging.error(f"Failed to refresh the event database. Exception: {e}")
+
+            await asyncio.sleep(delay=36000)
 
     def get_likely_event_type(self, event_id: str) -> str:
         """
@@ -183,19 +428,63 @@ class Events(object):
         str
             Most likely event type.
         """
-        try:
-            event_types = self.data[event_id]["event_types"]
-            most_likely, _ = sorted(
-                event_types.items(), key=lambda value: value[1], reverse=True
-            )[0]
-        except AttributeError:
-            logging.error(f"Failed to get most likely event of {event_id}")
-            return ""
+        event = self.data[event_id]
+        if event.most_likely:
+            return event.most_likely
+        if event.event_types:
+            return most_likely_event_type(event.event_types)
+
+        logging.error(f"Failed to get most likely event of {event_id}")
+        return ""
+
+    def snapshot(self) -> Tuple[int, TimeIndex, Dict[str, SuperEvent]]:
+        """
+        Return the version, time index and data of the events at once.
 
-        return most_likely
+        The three are replaced together when the events change. Reading them one
+        at a time could pair the time index of one version with the data of
+        another.
+        """
+        with self._lock:
+            return self.version, self.time_index, self.data
 
     @property
-    def latest(self) -> Dict[str, dict]:
+    def table(self) -> EventTable:
+        """
+        Return the columnar table of the current events.
+
+        The table is rebuilt on first use after `data` was replaced, so any number
+        of queries between two updates share one table.
+        """
+        with self._lock:
+            if self._table.version != self.version:
+                self._table = EventTable(self.data, self.version)
+
+            return self._table
+
+    def query(self, **conditions) -> List[str]:
+        """
+        Return the ids of the events which match all conditions.
+
+        Examples
+        --------
+        BNS with P > 0.5 closer than 1 Gly seen by all three detectors:
+
+        >>> events.query(
+        ...     event_type="BNS",
+        ...     min_probability=0.5,
+        ...     max_distance_mly=1000,
+        ...     instruments=("H1", "L1", "V1"),
+        ... )
+
+        See Also
+        --------
+        eventtable.EventTable.mask
+        """
+        return self.table.query(**conditions)
+
+    @property
+    def latest(self) -> Dict[str, SuperEvent]:
         """
         Return the latest event from the Grace database.
 
@@ -204,12 +493,15 @@ class Events(object):
         dict
             Latest event.
         """
-        for id, info in self.data.items():
-            return {id: info}
+        with self._lock:
+            time_index, data = self.time_index, self.data
+        event_id = time_index.latest()
+        if event_id is None:
+            return {}
 
-        return {"": dict()}
+        return {event_id: data[event_id]}
 
-    def picture(self, event_id: str) -> str:
+    def picture(self, event_id: str, refresh: bool = False) -> str:
         """
         Return local path of an image from a specific event.
 
@@ -219,25 +511,143 @@ class Events(object):
         ----------
         event_id : str
             The name of the event you want to have a picture of.
+        refresh : bool
+            Request the file list again, to find newly uploaded images.
 
         Returns
         -------
         str
             Local path of the image.
         """
-        files = self.client.files(event_id).json()
+        if refresh:
+            self.invalidate_files(event_id)
 
-        for fname in ["LALInference", "skymap", "bayestar"]:
-            link = get_latest_file_url(files, fname, ".png")
-            if len(link) > 0:
-                break
+        _, link = self._file_list(event_id)
 
         if len(link) == 0:
             raise FileNotFoundError
-        else:
-            img = ImageFromUrl(link)
 
-        return img.path
+        return self.image_pool.process(link)
+
+    def _file_list(self, event_id: str) -> Tuple[Dict[str, str], str]:
+        """
+        Return the file list and the url of the best image of an event.
+
+        Both are cached until the event is updated, so the file list is only
+        requested again when new images could have been uploaded.
+
+        Parameters
+        ----------
+        event_id : str
+
+        Returns
+        -------
+        Tuple[dict, str]
+            File list, with the filenames as keys and the urls as values, and the
+            url of the best image, which is empty if the event has no image.
+        """
+        cached = self.file_lists.get(event_id)
+        if cached is None:
+            files = self.client.files(event_id).json()
+            cached = (files, best_image_url(files))
+            self.file_lists.set(event_id, cached)
+
+        return cached
+
+    def invalidate_files(self, event_id: str) -> None:
+        """
+        Forget the cached file list and image url of an event.
+        """
+        self.file_lists.invalidate(event_id)
+
+
+class AsyncEvents(object):
+    """
+    Awaitable versions of the `Events` methods which contact the Grace database.
+
+    The blocking GraceDB requests run in a thread pool, so the event loop can keep
+    handling other messages while events are updated.
+
+    Parameters
+    ----------
+    events : Events
+        The events to update.
+    max_workers : int
+        Maximum number of threads which make requests at the same time.
+    """
+
+    def __init__(self, events: Events, max_workers: int = 4):
+        self.events = events
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="gracedb"
+        )
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def update_all(self) -> None:
+        await self._run(self.events.update_all)
+
+    async def sync(self) -> None:
+        await self._run(self.events.sync)
+
+    async def update_events_last_week(self) -> None:
+        await self._run(self.events.update_events_last_week)
+
+    async def update_single(self, event_id: str) -> None:
+        await self._run(self.events.update_single, event_id)
+
+    async def picture(self, event_id: str, refresh: bool = False) -> str:
+        """
+        Return local path of an image from a specific event.
+
+        See Also
+        --------
+        Events.picture
+        """
+        return await self._run(self.events.picture, event_id, refresh)
+
+
+def most_likely_event_type(p_astro: Dict[str, float]) -> str:
+    """
+    Return the event type with the highest probability.
+
+    Parameters
+    ----------
+    p_astro : dict
+        Keys are the event types and the values their probabilities.
+
+    Returns
+    -------
+    str
+        Most likely event type.
+    """
+    return max(p_astro, key=p_astro.__getitem__)
+
+
+def best_image_url(files: Dict[str, str]) -> str:
+    """
+    Return the url of the best image in a file list.
+
+    Image priority is as follows: 1) LALInference 2) skymap 3) bayestar.png.
+
+    Parameters
+    ----------
+    files : dict
+        Keys are the filenames and the values are the urls.
+
+    Returns
+    -------
+    str
+        URL of the image, or an empty string if there is no image.
+    """
+    for fname in ["LALInference", "skymap", "bayestar"]:
+        link = get_latest_file_url(files, fname, ".png")
+        if len(link) > 0:
+            return link
+
+    return ""
 
 
 def get_latest_file_url(files: dict, starts_with: str, file_extension: str) -> str:
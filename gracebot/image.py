@@ -1,6 +1,8 @@
 import logging
 import os
+import threading
 from io import BytesIO
+from typing import Optional, Tuple
 
 import numpy as np
 import requests
@@ -12,22 +14,26 @@ class ImageFromUrl(object):
     Get an image from an URL and optionally crop it.
     """
 
-    def __init__(self, url: str, border: int = 5) -> None:
+    def __init__(self, url: str, border: int = 5, path: Optional[str] = None) -> None:
         self.url = url
-        self.event_id = self.url.split("/")[-3]
+        self.event_id = event_id_from_url(self.url)
         self.filename = self.get_filename()
 
-        self.dir = f"gracebot/img/{self.event_id}"
+        if path is None:
+            self.dir = f"gracebot/img/{self.event_id}"
+            path = f"{self.dir}/{self.filename}"
+        else:
+            self.dir = os.path.dirname(path)
         create_dir(self.dir)
 
-        self._path = f"{self.dir}/{self.filename}"
+        self._path = path
         if not os.path.isfile(self._path):
             logging.info(
                 f"Getting event image, because no image was found at {self._path}."
             )
             self.img = self.from_url()
             self.reduce_whitespace(border)
-            self.img.save(self.path)
+            self.save()
         else:
             logging.info(f"Serving image from {self._path}")
 
@@ -35,6 +41,16 @@ class ImageFromUrl(object):
     def path(self) -> str:
         return self._path
 
+    def save(self) -> None:
+        """
+        Save the image, such that others never see a partially written file.
+        """
+        tmp_path = (
+            f"{self.dir}/tmp{os.getpid()}-{threading.get_ident()}-{self.filename}"
+        )
+        self.img.save(tmp_path)
+        os.replace(tmp_path, self._path)
+
     def get_filename(self) -> str:
         """
         Return valid filename for image.
@@ -49,15 +65,7 @@ class ImageFromUrl(object):
         str
             Converted filename.
         """
-        fname = self.url.split("/")[-1]
-        if "," in fname:
-            _fname, _i = fname.split(",")
-            _split_fname = _fname.split(".")
-            _name = _split_fname[0]
-            _extension = _split_fname[-1]
-            return _name + _i + "." + _extension
-        else:
-            return fname
+        return image_filename(self.url)
 
     def from_url(self) -> PngImagePlugin.PngImageFile:
         """
@@ -98,16 +106,101 @@ class ImageFromUrl(object):
         if self.img is None:
             raise FileExistsError("Load an image first with from_url.")
 
-        pix = np.asarray(self.img)
+        bbox = find_bounding_box(self.img)
+        if bbox is None:
+            logging.warning(f"Not cropping {self.url}, because it is completely white.")
+            return
 
-        pix = pix[:, :, 0:3]  # Drop the alpha channel
-        idx = np.where(pix - 255)[0:2]  # Drop the color when finding edges
-        bbox = list(map(min, idx))[::-1] + list(map(max, idx))[::-1]
-        larger_box = add_whitespace(bbox, border)
+        larger_box = add_whitespace(list(bbox), border)
 
         self.img = self.img.crop(larger_box)
 
 
+def find_bounding_box(
+    img: Image.Image, rows_per_chunk: int = 256
+) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Find the smallest box which contains all non-white pixels of an image.
+
+    The image is processed in chunks of rows. For every chunk only a boolean mask
+    of the non-white pixels is made, which is reduced to the rows and columns
+    that contain a non-white pixel. The alpha channel is ignored.
+
+    Parameters
+    ----------
+    img : PIL.Image.Image
+        The image.
+    rows_per_chunk : int
+        Number of rows which are processed at once.
+
+    Returns
+    -------
+    tuple of int or None
+        Left, upper, right and lower coordinate of the outermost non-white
+        pixels, or None if all pixels are white.
+    """
+    width, height = img.size
+    columns = np.zeros(width, dtype=bool)
+    first_row: Optional[int] = None
+    last_row = 0
+
+    for top in range(0, height, rows_per_chunk):
+        chunk = img.crop((0, top, width, min(top + rows_per_chunk, height)))
+        if chunk.mode not in ("RGB", "RGBA"):
+            chunk = chunk.convert("RGB")
+        pix = np.asarray(chunk)
+
+        non_white = pix[:, :, 0] != 255
+        non_white |= pix[:, :, 1] != 255
+        non_white |= pix[:, :, 2] != 255
+
+        rows = np.flatnonzero(non_white.any(axis=1))
+        if len(rows) == 0:
+            continue
+        if first_row is None:
+            first_row = top + int(rows[0])
+        last_row = top + int(rows[-1])
+        columns |= non_white.any(axis=0)
+
+    if first_row is None:
+        return None
+
+    non_white_columns = np.flatnonzero(columns)
+
+    return (
+        int(non_white_columns[0]),
+        first_row,
+        int(non_white_columns[-1]),
+        last_row,
+    )
+
+
+def event_id_from_url(url: str) -> str:
+    """
+    Return the event id from the url of a file of an event.
+    """
+    return url.split("/")[-3]
+
+
+def image_filename(url: str) -> str:
+    """
+    Return valid filename for the image at `url`.
+
+    See Also
+    --------
+    ImageFromUrl.get_filename
+    """
+    fname = url.split("/")[-1]
+    if "," in fname:
+        _fname, _i = fname.split(",")
+        _split_fname = _fname.split(".")
+        _name = _split_fname[0]
+        _extension = _split_fname[-1]
+        return _name + _i + "." + _extension
+    else:
+        return fname
+
+
 def add_whitespace(bounding_box: list, border: int = 5) -> list:
     """
     Add white space to an existing bounding box.
@@ -141,3 +234,77 @@ def create_dir(directory) -> None:
             os.makedirs(directory)
         except OSError:
             logging.error(f"Creation of the directory {directory} failed")
+
+
+def telegram_variant(
+    img: Image.Image, max_size: int = 1280, colors: Optional[int] = 256
+) -> Image.Image:
+    """
+    Make a smaller copy of an image to send with Telegram.
+
+    Telegram scales photos down to at most 1280 pixels on a side and recompresses
+    them, so larger images only cost upload time. The copy is flattened on a white
+    background, scaled down to at most `max_size` pixels on a side and reduced to
+    a palette of `colors` colors.
+
+    Parameters
+    ----------
+    img : PIL.Image.Image
+        The image.
+    max_size : int
+        Maximum width and height in pixels.
+    colors : int, optional
+        Number of colors in the palette. If None, the colors aren't reduced.
+
+    Returns
+    -------
+    PIL.Image.Image
+        The smaller image.
+    """
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        flattened = Image.new("RGB", img.size, "white")
+        flattened.paste(img, mask=img.getchannel("A"))
+        img = flattened
+    else:
+        img = img.convert("RGB")
+
+    # The filters moved to Image.Resampling in Pillow 9.1
+    lanczos = getattr(Image, "Resampling", Image).LANCZOS
+    img.thumbnail((max_size, max_size), lanczos)
+    if colors is not None:
+        img = img.quantize(colors)
+
+    return img
+
+
+def process_image(
+    url: str, path: str, border: int = 5, telegram_path: Optional[str] = None
+) -> str:
+    """
+    Download and crop an image if it isn't on disk yet.
+
+    A module level function, so it can run in a worker process.
+
+    Parameters
+    ----------
+    url : str
+        URL of the image.
+    path : str
+        Where to save the image.
+    border : int
+        The amount of white space in pixels around the cropped image.
+    telegram_path : str, optional
+        If given, a smaller variant for Telegram is saved here as a PNG.
+
+    Returns
+    -------
+    str
+        Local path of the image.
+    """
+    image = ImageFromUrl(url, border, path)
+    if telegram_path is not None:
+        img = getattr(image, "img", None) or Image.open(image.path)
+        telegram_variant(img).save(telegram_path, format="PNG", optimize=True)
+
+    return image.path
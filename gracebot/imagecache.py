@@ -0,0 +1,105 @@
+import logging
+import os
+import uuid
+from typing import Tuple
+
+from diskcache import DiskCache
+from image import event_id_from_url, image_filename
+
+
+class ImageCache(DiskCache):
+    """
+    Size bounded least recently used cache of the processed event images.
+
+    The images are stored as `{event_id}/{filename}` in `directory`. Variants of
+    an image are stored under the url followed by `#{variant}`, as
+    `{event_id}/{name}.{variant}.{extension}`. The index holds the url, size, last
+    access time and GraceDB file version of every image. When a newer version of
+    an image is cached, the older versions of that image and its variants are
+    removed.
+
+    Parameters
+    ----------
+    directory : str
+        Where the images are stored.
+    max_bytes : int
+        Maximum total size of the images.
+    """
+
+    def __init__(self, directory: str = "gracebot/img", max_bytes: int = 200_000_000):
+        super().__init__(directory, max_bytes)
+
+    @staticmethod
+    def _name(key: str) -> str:
+        url, _, variant = key.partition("#")
+        fname = image_filename(url)
+        if variant:
+            root, extension = os.path.splitext(fname)
+            fname = f"{root}.{variant}{extension}"
+
+        return os.path.join(event_id_from_url(url), fname)
+
+    def staging_path(self, url: str) -> str:
+        """
+        Return a unique path next to the cached image, to write a new image to.
+        """
+        path = self._path(self._name(url))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        return f"{path}.{uuid.uuid4().hex}.tmp"
+
+    def put_file(self, key: str, src: str, **metadata) -> str:
+        """
+        Move a processed image into the cache and remove its older versions.
+
+        See Also
+        --------
+        DiskCache.put_file
+        """
+        base, version = file_version(key)
+        path = super().put_file(key, src, version=version, **metadata)
+
+        event_id = event_id_from_url(key)
+        with self._lock:
+            stale = [
+                entry["key"]
+                for entry in self._index.values()
+                if event_id_from_url(entry["key"]) == event_id
+                and file_version(entry["key"])[0] == base
+                and file_version(entry["key"])[1] < version
+            ]
+        for stale_key in stale:
+            logging.info(f"Removing {stale_key}, which is replaced by {key}")
+            self.remove(stale_key)
+
+        return path
+
+
+def variant_key(url: str, variant: str = "") -> str:
+    """
+    Return the cache key of a variant of the image at `url`.
+    """
+    return f"{url}#{variant}" if variant else url
+
+
+def file_version(url: str) -> Tuple[str, int]:
+    """
+    Return the filename and version of a GraceDB file url.
+
+    Parameters
+    ----------
+    url : str
+        For example '.../files/bayestar.png,1', optionally followed by a variant.
+
+    Returns
+    -------
+    Tuple[str, int]
+        Filename without the version and the version, which is 0 if the url has
+        no version.
+    """
+    fname = url.partition("#")[0].split("/")[-1]
+    if "," in fname:
+        fname, version = fname.split(",")
+        return fname, int(version)
+
+    return fname, 0
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+
+from image import process_image
+from imagecache import ImageCache, variant_key
+
+# Variants of every image which are cached
+variants = ("", "telegram")
+
+
+class ImagePool(object):
+    """
+    Process images in a pool of worker processes and keep them in a cache.
+
+    Every image is cached in its original size and as a smaller variant to send
+    with Telegram, see `image.telegram_variant`.
+
+    Decoding, cropping and encoding an image is CPU bound and holds the GIL, so it
+    runs in separate processes. At most `max_pending` images are processed or
+    queued at the same time; further requests block until a slot is free. Requests
+    for an image which is already being processed wait for the same job. Can be
+    shared between threads.
+
+    Parameters
+    ----------
+    cache : ImageCache, optional
+        Where the processed images are stored.
+    max_workers : int, optional
+        Number of worker processes, by default the number of cores.
+    max_pending : int
+        Maximum number of images which are processed or queued at the same time.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ImageCache] = None,
+        max_workers: Optional[int] = None,
+        max_pending: int = 8,
+    ):
+        self.cache = ImageCache() if cache is None else cache
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def process(self, url: str, border: int = 5, variant: str = "telegram") -> str:
+        """
+        Get a processed image from the cache, or download and crop it.
+
+        If the image is already being processed, wait for that job instead.
+
+        Parameters
+        ----------
+        url : str
+            URL of the image.
+        border : int
+            The amount of white space in pixels around the cropped image.
+        variant : str
+            Either "telegram" for the variant to send with Telegram, or "" for the
+            image in its original size.
+
+        Returns
+        -------
+        str
+            Local path of the image.
+        """
+        if variant not in variants:
+            raise ValueError(f"Unknown image variant {variant!r}")
+
+        with self._lock:
+            path = self.cache.get_path(variant_key(url, variant))
+            if path is not None:
+                return path
+
+            job = self._in_flight.get(url)
+            if job is None:
+                job = Future()
+                self._in_flight[url] = job
+                owner = True
+            else:
+                logging.debug(f"Waiting for image {url}, which is already processed.")
+                owner = False
+
+        if not owner:
+            return job.result()[variant]
+
+        staged: Dict[str, str] = {}
+        try:
+            for v in variants:
+                staged[v] = self.cache.staging_path(variant_key(url, v))
+            with self._slots:
+                self._pool().submit(
+                    process_image, url, staged[""], border, staged["telegram"]
+                ).result()
+            paths = {
+                v: self.cache.put_file(variant_key(url, v), staged[v]) for v in variants
+            }
+        except BaseException as e:
+            # Files which were written before the job failed aren't in the cache
+            for staged_path in staged.values():
+                try:
+                    os.remove(staged_path)
+                except FileNotFoundError:
+                    pass
+            job.set_exception(e)
+            raise
+        else:
+            job.set_result(paths)
+        finally:
+            with self._lock:
+                del self._in_flight[url]
+
+        return paths[variant]
+
+    def start(self) -> None:
+        """
+        Start the worker processes.
+
+        Call this at start up, before other threads run. The workers are forked,
+        and forking while other threads run can copy a lock which one of them
+        holds, such as a logging lock, into the worker, which then hangs. Without
+        this, the workers are started when the first image is processed.
+        """
+        # The executor starts all its workers on the first job
+        self._pool().submit(os.getpid).result()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
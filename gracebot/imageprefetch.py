@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import urllib.error
+from typing import Dict, Optional
+
+import ligo.gracedb.exceptions
+import requests
+
+from gwevents import AsyncEvents
+
+
+class ImagePrefetcher(object):
+    """
+    Download and crop the images of an event in the background.
+
+    When a notice of an event arrives, the best image of the event is processed
+    straight away, so a broadcast finds it on disk. The file list of the event is
+    then polled with exponential backoff, to also process images which are
+    uploaded later, until the LALInference image is found or `max_polls` is
+    reached.
+
+    Parameters
+    ----------
+    events : AsyncEvents
+        The events to get the images from.
+    first_delay : float
+        Seconds before the first poll for a newer image.
+    max_delay : float
+        Maximum number of seconds between two polls.
+    max_polls : int
+        Number of polls after which the prefetcher stops.
+    """
+
+    def __init__(
+        self,
+        events: AsyncEvents,
+        first_delay: float = 30,
+        max_delay: float = 1800,
+        max_polls: int = 10,
+    ):
+        self.events = events
+        self.first_delay = first_delay
+        self.max_delay = max_delay
+        self.max_polls = max_polls
+        self.pictures: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._first_pass: Dict[str, asyncio.Event] = {}
+
+    def prefetch(self, event_id: str) -> asyncio.Task:
+        """
+        Start processing the images of an event in the background.
+
+        A prefetch of the same event which is still running is restarted, because a
+        new notice means that new images could be uploaded.
+
+        Parameters
+        ----------
+        event_id : str
+
+        Returns
+        -------
+        asyncio.Task
+            The task which processes the images.
+        """
+        running = self._tasks.get(event_id)
+        if running is not None:
+            running.cancel()
+
+        first_pass = self._first_pass.setdefault(event_id, asyncio.Event())
+        first_pass.clear()
+        task = asyncio.get_event_loop().create_task(self._poll(event_id, first_pass))
+        self._tasks[event_id] = task
+        task.add_done_callback(lambda done: self._forget(event_id, done))
+
+        return task
+
+    def _forget(self, event_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(event_id) is task:
+            del self._tasks[event_id]
+            self._first_pass.pop(event_id).set()
+
+    async def wait(self, event_id: str, timeout: float = 60) -> None:
+        """
+        Wait until the first image of a prefetched event is processed.
+
+        Parameters
+        ----------
+        event_id : str
+        timeout : float
+            Maximum number of seconds to wait.
+        """
+        first_pass = self._first_pass.get(event_id)
+        if first_pass is None:
+            return
+
+        try:
+            await asyncio.wait_for(first_pass.wait(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Image of {event_id} is not prefetched yet.")
+
+    async def _poll(self, event_id: str, first_pass: asyncio.Event) -> None:
+        delay = self.first_delay
+        for poll in range(self.max_polls + 1):
+            if poll > 0:
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, self.max_delay)
+
+            picture = await self._process(event_id)
+            first_pass.set()
+            if picture is not None and "LALInference" in picture:
+                return
+
+    async def _process(self, event_id: str) -> Optional[str]:
+        """
+        Process the best image of an event if it wasn't processed already.
+
+        Returns
+        -------
+        str or None
+            Local path of the image, or None if the event has no image yet.
+        """
+        try:
+            picture = await self.events.picture(event_id, refresh=True)
+        except FileNotFoundError:
+            logging.info(f"No image of {event_id} found yet.")
+            return None
+        except (
+            ligo.gracedb.exceptions.HTTPError,
+            urllib.error.HTTPError,
+            requests.RequestException,
+            OSError,
+        ) as e:
+            logging.warning(f"Failed to prefetch the image of {event_id}: {e}")
+            return None
+
+        if self.pictures.get(event_id) != picture:
+            logging.info(f"Prefetched image {picture}")
+            self.pictures[event_id] = picture
+
+        return picture
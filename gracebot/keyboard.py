@@ -1,56 +1,165 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
 from aiogram import types
 from more_itertools import chunked
 
+from superevent import SuperEvent
+from timeindex import TimeIndex
+from ttlcache import TTLCache
 
-class InlineKeyboard(types.InlineKeyboardMarkup):
-    def __init__(self, keys: list = [], rows: int = 1, columns: int = 2):
-        super().__init__()
-        self._keys = keys
-        self._columns = columns
-        self._increment = rows * columns
-        self._start: int = 0
-        self._make_keyboard()
+# Prefixes of the callback data of the event selection keyboard
+event_prefix = "event"
+page_prefix = "page"
 
-    @property
-    def all_keys(self):
-        return self._keys
 
-    @property
-    def visible_keys(self):
-        return self._keys[self._start : self._start + self._increment]
+def event_callback(event_id: str) -> str:
+    return f"{event_prefix}:{event_id}"
 
-    async def update(self, query: types.CallbackQuery):
-        if query.data == "previous":
-            self._start += self._increment
-        elif query.data == "next":
-            self._start -= self._increment
 
-        self.inline_keyboard: list = []
-        self._make_keyboard()
+def page_callback(version: int, offset: int) -> str:
+    return f"{page_prefix}:{version}:{offset}"
 
-        await query.message.edit_reply_markup(reply_markup=self)
 
-    def _navigation_buttons(self) -> list:
-        navigation_buttons = []
+def parse_page_payload(payload: str) -> Tuple[int, int]:
+    """
+    Return the version and offset from the payload of a page button.
 
-        if self._start < (len(self._keys) - self._increment):
-            navigation_buttons.append(
-                types.InlineKeyboardButton("<<", callback_data="previous")
+    Raises
+    ------
+    ValueError
+        If the payload isn't `{version}:{offset}`.
+    """
+    version, offset = payload.split(":")
+
+    return int(version), int(offset)
+
+
+class EventPages(object):
+    """
+    Pages of the inline keyboard to select an event.
+
+    The keyboard is stateless: the buttons to go to another page carry the version
+    of the events and the offset of that page in their callback data. A page is
+    a slice of the time index of the events, newest first. Rendered pages are
+    cached and shared between all chats. The time index and events of the last
+    few versions are kept, so an old keyboard keeps paging through the events it
+    showed at first.
+
+    Parameters
+    ----------
+    events : gwevents.Events
+        Events whose `snapshot` returns the version, time index and data of the
+        events at once.
+    rows : int
+        Number of rows with events per page.
+    columns : int
+        Number of events per row.
+    max_versions : int
+        Number of versions of which the events are kept.
+    max_pages : int
+        Number of rendered pages which are cached.
+    """
+
+    def __init__(
+        self,
+        events,
+        rows: int = 4,
+        columns: int = 2,
+        max_versions: int = 4,
+        max_pages: int = 256,
+    ):
+        self.events = events
+        self.columns = columns
+        self.page_size = rows * columns
+        self.max_versions = max_versions
+        self._snapshots: "OrderedDict[int, Tuple[TimeIndex, Dict[str, SuperEvent]]]" = (
+            OrderedDict()
+        )
+        self._pages = TTLCache(max_size=max_pages, ttl=24 * 3600)
+        self._lock = threading.Lock()
+
+    def _snapshot(
+        self, version: Optional[int]
+    ) -> Tuple[int, Tuple[TimeIndex, Dict[str, SuperEvent]]]:
+        with self._lock:
+            if version is not None and version in self._snapshots:
+                return version, self._snapshots[version]
+
+            current, time_index, data = self.events.snapshot()
+            if current not in self._snapshots:
+                self._snapshots[current] = (time_index, data)
+                while len(self._snapshots) > self.max_versions:
+                    self._snapshots.popitem(last=False)
+
+            return current, self._snapshots[current]
+
+    def page(
+        self, offset: int = 0, version: Optional[int] = None
+    ) -> types.InlineKeyboardMarkup:
+        """
+        Return a page of the keyboard.
+
+        Parameters
+        ----------
+        offset : int
+            Index of the first event on the page.
+        version : int, optional
+            Version of the events. By default, or if that version isn't kept
+            anymore, the current version is used.
+
+        Returns
+        -------
+        types.InlineKeyboardMarkup
+            The keyboard.
+        """
+        version, (time_index, data) = self._snapshot(version)
+        offset = max(0, min(offset, max(len(time_index) - 1, 0)))
+
+        keyboard = self._pages.get((version, offset))
+        if keyboard is None:
+            keyboard = self._make_keyboard(version, offset, time_index, data)
+            self._pages.set((version, offset), keyboard)
+
+        return keyboard
+
+    def _make_keyboard(
+        self,
+        version: int,
+        offset: int,
+        time_index: TimeIndex,
+        data: Dict[str, SuperEvent],
+    ) -> types.InlineKeyboardMarkup:
+        keyboard = types.InlineKeyboardMarkup()
+        event_ids = time_index.newest(self.page_size, offset)
+        for row_ids in chunked(event_ids, self.columns):
+            keyboard.row(
+                *[
+                    types.InlineKeyboardButton(
+                        f"{event_id} {data[event_id].most_likely or ''}".strip(),
+                        callback_data=event_callback(event_id),
+                    )
+                    for event_id in row_ids
+                ]
             )
-        if self._start > 0:
+
+        navigation_buttons = []
+        if offset + self.page_size < len(time_index):
             navigation_buttons.append(
-                types.InlineKeyboardButton(">>", callback_data="next")
+                types.InlineKeyboardButton(
+                    "<<", callback_data=page_callback(version, offset + self.page_size)
+                )
             )
-
-        return navigation_buttons
-
-    def _make_keyboard(self):
-        for keys in chunked(self.visible_keys, self._columns):
-            row = []
-            for key in keys:
-                row.append(
-                    types.InlineKeyboardButton(key.replace("_", " "), callback_data=key)
+        if offset > 0:
+            navigation_buttons.append(
+                types.InlineKeyboardButton(
+                    ">>",
+                    callback_data=page_callback(
+                        version, max(0, offset - self.page_size)
+                    ),
                 )
-            self.row(*row)
+            )
+        keyboard.row(*navigation_buttons)
 
-        self.row(*self._navigation_buttons())
+        return keyboard
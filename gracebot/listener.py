@@ -6,6 +6,7 @@ import lxml.etree
 
 import sender
 from logconfig import logging_kwargs
+from voeventparams import parse_params
 
 logging.basicConfig(**logging_kwargs)  # type: ignore
 
@@ -24,9 +25,7 @@ def process_gcn(payload, root):
     if root.attrib["role"] != "observation":
         return
 
-    params = {
-        elem.attrib["name"]: elem.attrib["value"] for elem in root.iterfind(".//Param")
-    }
+    params = parse_params(payload, ["GraceID", "AlertType"])
 
     message_poster = {
         "Preliminary": sender.post_preliminary,
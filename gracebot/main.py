@@ -36,12 +36,9 @@ async def send_event(message: types.Message):
     await bot.send_event_selector(message)
 
 
-event_selection_keys = bot.event_keys + ["next", "previous"]
-
-
-@dp.callback_query_handler(lambda cb: cb.data in event_selection_keys)
+@dp.callback_query_handler(bot.callback_router.handles)
 async def inline_kb_answer_callback_handler(query: types.CallbackQuery):
-    await bot.event_selector_callback_handler(query)
+    await bot.callback_router.dispatch(query)
 
 
 @dp.message_handler(commands=["stats"])
@@ -54,6 +51,11 @@ async def send_detector_status(message: types.Message):
     await bot.send_detector_status(message)
 
 
+@dp.message_handler(commands=["uptime"])
+async def send_detector_uptime(message: types.Message):
+    await bot.send_detector_uptime(message)
+
+
 @dp.message_handler(commands=["subscribe"])
 async def add_subscriber(message: types.Message):
     await bot.add_subscriber(message)
@@ -64,6 +66,11 @@ async def remove_subscriber(message: types.Message):
     await bot.remove_subscriber(message)
 
 
+@dp.message_handler(commands=["filter"])
+async def set_preferences(message: types.Message):
+    await bot.set_preferences(message)
+
+
 @dp.message_handler(commands=[preliminary_command])
 @dp.async_task
 async def send_preliminary(message: types.Message):
@@ -88,6 +95,9 @@ async def on_startup(dp):
 
 
 if __name__ == "__main__":
+    # Fork the image workers before the event loop starts any threads
+    bot.events.image_pool.start()
+
     webapp_host = "localhost"
     webapp_port = get_port()
 
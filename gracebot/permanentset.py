@@ -1,3 +1,6 @@
+import logging
+import os
+import time
 from typing import Union
 
 PSet = Union[int, str]
@@ -6,36 +9,123 @@ PSet = Union[int, str]
 class PermanentSet(object):
     """
     Holds and saves a set of ints in a local text file.
+
+    Changes are appended as `+item` or `-item` records to a journal next to the
+    file, so a change only writes a single line. The journal is flushed after every
+    change and synced to disk at most every `sync_interval` seconds. When loading,
+    the journal is replayed on top of the file. Once the journal has more than
+    `compact_after` records, and more records than the set has items, the set is
+    written to the file atomically and the journal is emptied.
+
+    Parameters
+    ----------
+    fname : str
+        File in which the items are saved, one per line.
+    typ : type
+        Type of the items.
+    sync_interval : float
+        Maximum number of seconds between two syncs of the journal to disk.
+    compact_after : int
+        Minimum number of journal records before the journal is compacted.
     """
 
-    def __init__(self, fname: str, typ: type):
+    def __init__(
+        self,
+        fname: str,
+        typ: type,
+        sync_interval: float = 1.0,
+        compact_after: int = 1000,
+    ):
         self.fname = fname
         self.typ = typ
+        self.journal_fname = f"{fname}.journal"
+        self.sync_interval = sync_interval
+        self.compact_after = compact_after
         self.data = self._read()
+        self._journal_records = 0
+        self._last_sync = time.monotonic()
+        self._compact()
 
     def _read(self) -> set:
         data: set = set()
         try:
             with open(self.fname, "r") as f:
-                data = {self.typ(num.rstrip()) for num in f.readlines()}
+                data = {self.typ(num.rstrip()) for num in f.readlines() if num.strip()}
         except FileNotFoundError:
-            with open(self.fname, "w") as _:
-                pass
+            if os.path.isfile(self.journal_fname):
+                logging.warning(
+                    f"Ignoring {self.journal_fname}, because {self.fname} is missing."
+                )
+                os.remove(self.journal_fname)
+            return data
+
+        self._replay(data)
 
         return data
 
+    def _replay(self, data: set) -> None:
+        try:
+            with open(self.journal_fname, "r") as f:
+                lines = f.read().split("\n")
+        except FileNotFoundError:
+            return
+
+        # The last line is empty, or a record which wasn't completely written
+        for line in lines[:-1]:
+            op, item = line[:1], self.typ(line[1:])
+            if op == "+":
+                data.add(item)
+            elif op == "-":
+                data.discard(item)
+
     def _save_data(self):
-        with open(self.fname, "w") as f:
+        tmp_fname = f"{self.fname}.tmp"
+        with open(tmp_fname, "w") as f:
             f.write("\n".join((str(num) for num in self.data)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_fname, self.fname)
 
-    def add(self, number: PSet):
-        self.data.add(number)
+    def _compact(self) -> None:
         self._save_data()
+        open(self.journal_fname, "w").close()
+        self._journal = open(self.journal_fname, "a")
+        self._journal_records = 0
+
+    def _append(self, op: str, number: PSet) -> None:
+        self._journal.write(f"{op}{number}\n")
+        self._journal.flush()
+        self._journal_records += 1
+
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+        if self._journal_records > max(self.compact_after, len(self.data)):
+            self._journal.close()
+            self._compact()
+
+    def sync(self) -> None:
+        """
+        Sync the journal to disk.
+        """
+        os.fsync(self._journal.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Sync and close the journal.
+        """
+        self.sync()
+        self._journal.close()
+
+    def add(self, number: PSet):
+        if number not in self.data:
+            self.data.add(number)
+            self._append("+", number)
 
     def remove(self, number: PSet):
         try:
             self.data.remove(number)
-            self._save_data()
+            self._append("-", number)
         except KeyError:
             pass
 
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Hashable
+from urllib.parse import urlparse
+
+
+class RateLimiter(object):
+    """
+    Spaces calls evenly per key, such that at most `calls_per_second` calls per
+    second are made for the same key.
+
+    Every caller reserves the next free slot of its key and then waits until that
+    slot. Can be shared between threads.
+    """
+
+    def __init__(self, calls_per_second: float):
+        self.interval = 1 / calls_per_second if calls_per_second > 0 else 0.0
+        self._next_slot: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: Hashable = None) -> float:
+        """
+        Reserve the next slot of a key.
+
+        Returns
+        -------
+        float
+            Seconds until the reserved slot.
+        """
+        if self.interval == 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + self.interval
+
+        return slot - now
+
+    def forget_before(self, timestamp: float) -> None:
+        """
+        Forget the keys whose next slot is before a `time.monotonic` timestamp.
+
+        These keys may be called right away, so forgetting them doesn't change the
+        limits.
+        """
+        with self._lock:
+            for key in [k for k, slot in self._next_slot.items() if slot < timestamp]:
+                del self._next_slot[key]
+
+
+class HostRateLimiter(RateLimiter):
+    """
+    Limits the number of requests per second which are made to each host.
+
+    Can be shared between threads. Every thread which wants to make a request
+    calls `wait` first, which blocks until the host may be contacted again.
+    """
+
+    def __init__(self, requests_per_second: float = 5.0):
+        super().__init__(requests_per_second)
+
+    def wait(self, url: str) -> None:
+        """
+        Block until a request to the host of `url` is allowed.
+
+        Parameters
+        ----------
+        url : str
+            URL which is about to be requested.
+
+        Returns
+        -------
+        None
+        """
+        delay = self.reserve(urlparse(url).netloc)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AsyncRateLimiter(RateLimiter):
+    """
+    Spaces the calls of coroutines per key, without blocking the event loop.
+    """
+
+    async def wait(self, key: Hashable = None) -> None:
+        """
+        Sleep until a call for `key` is allowed.
+        """
+        delay = self.reserve(key)
+        if delay > 0:
+            await asyncio.sleep(delay)
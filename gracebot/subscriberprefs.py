@@ -0,0 +1,209 @@
+import json
+import logging
+import math
+import os
+from bisect import bisect_left, bisect_right, insort
+from typing import AbstractSet, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+event_types = ("BNS", "NSBH", "BBH", "MassGap", "Terrestrial")
+alert_kinds = ("preliminary", "update", "retraction")
+
+
+class Preferences(NamedTuple):
+    """
+    Which alerts a subscriber wants to receive.
+
+    The defaults let every alert through.
+    """
+
+    event_types: FrozenSet[str] = frozenset(event_types)
+    min_probability: float = 0.0
+    max_distance_mly: Optional[float] = None
+    alert_kinds: FrozenSet[str] = frozenset(alert_kinds)
+
+
+class SubscriberPreferences(object):
+    """
+    Holds, saves and indexes the alert preferences of subscribers.
+
+    Subscribers are indexed per event type, per alert kind, by their minimum
+    probability and by their maximum distance, so the recipients of an alert are
+    found with a few set intersections instead of checking every subscriber.
+    Subscribers without preferences receive every alert.
+
+    Parameters
+    ----------
+    fname : str
+        JSON file in which the preferences are saved.
+    """
+
+    def __init__(self, fname: str):
+        self.fname = fname
+        self.data: Dict[int, Preferences] = {}
+        self._by_type: Dict[str, Set[int]] = {t: set() for t in event_types}
+        self._by_kind: Dict[str, Set[int]] = {k: set() for k in alert_kinds}
+        # Sorted (threshold, chat id) pairs
+        self._min_probability: List[Tuple[float, int]] = []
+        self._max_distance: List[Tuple[float, int]] = []
+        self._no_max_distance: Set[int] = set()
+        self._read()
+
+    def _read(self) -> None:
+        try:
+            with open(self.fname, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logging.warning(f"Ignoring corrupt subscriber preferences {self.fname}")
+            return
+
+        for chat_id, prefs in stored.items():
+            self._index(
+                int(chat_id),
+                Preferences(
+                    event_types=frozenset(prefs["event_types"]),
+                    min_probability=prefs["min_probability"],
+                    max_distance_mly=prefs["max_distance_mly"],
+                    alert_kinds=frozenset(prefs["alert_kinds"]),
+                ),
+            )
+
+    def _save_data(self) -> None:
+        stored = {
+            chat_id: {
+                "event_types": sorted(prefs.event_types),
+                "min_probability": prefs.min_probability,
+                "max_distance_mly": prefs.max_distance_mly,
+                "alert_kinds": sorted(prefs.alert_kinds),
+            }
+            for chat_id, prefs in self.data.items()
+        }
+
+        tmp_fname = f"{self.fname}.tmp"
+        with open(tmp_fname, "w") as f:
+            json.dump(stored, f)
+        os.replace(tmp_fname, self.fname)
+
+    def _index(self, chat_id: int, prefs: Preferences) -> None:
+        self.data[chat_id] = prefs
+        for event_type in prefs.event_types:
+            self._by_type[event_type].add(chat_id)
+        for kind in prefs.alert_kinds:
+            self._by_kind[kind].add(chat_id)
+        insort(self._min_probability, (prefs.min_probability, chat_id))
+        if prefs.max_distance_mly is None:
+            self._no_max_distance.add(chat_id)
+        else:
+            insort(self._max_distance, (prefs.max_distance_mly, chat_id))
+
+    def _unindex(self, chat_id: int) -> None:
+        prefs = self.data.pop(chat_id, None)
+        if prefs is None:
+            return
+
+        for event_type in prefs.event_types:
+            self._by_type[event_type].discard(chat_id)
+        for kind in prefs.alert_kinds:
+            self._by_kind[kind].discard(chat_id)
+        _remove_sorted(self._min_probability, (prefs.min_probability, chat_id))
+        if prefs.max_distance_mly is None:
+            self._no_max_distance.discard(chat_id)
+        else:
+            _remove_sorted(self._max_distance, (prefs.max_distance_mly, chat_id))
+
+    def get(self, chat_id: int) -> Preferences:
+        """
+        Return the preferences of a subscriber, or the defaults if there are none.
+        """
+        return self.data.get(chat_id, Preferences())
+
+    def set(self, chat_id: int, prefs: Preferences) -> None:
+        """
+        Store the preferences of a subscriber.
+
+        Parameters
+        ----------
+        chat_id : int
+        prefs : Preferences
+            Event types and alert kinds must be in `event_types` and
+            `alert_kinds`. The minimum probability must be between 0 and 1 and
+            the maximum distance finite and not negative.
+        """
+        unknown = (prefs.event_types - set(event_types)) | (
+            prefs.alert_kinds - set(alert_kinds)
+        )
+        if unknown:
+            raise ValueError(f"Unknown event types or alert kinds: {sorted(unknown)}")
+        # NaN thresholds can't be found again in the sorted indexes
+        if not 0 <= prefs.min_probability <= 1:
+            raise ValueError(f"Invalid minimum probability {prefs.min_probability}")
+        if prefs.max_distance_mly is not None and not (
+            math.isfinite(prefs.max_distance_mly) and prefs.max_distance_mly >= 0
+        ):
+            raise ValueError(f"Invalid maximum distance {prefs.max_distance_mly}")
+
+        self._unindex(chat_id)
+        if prefs != Preferences():
+            self._index(chat_id, prefs)
+        self._save_data()
+
+    def remove(self, chat_id: int) -> None:
+        """
+        Forget the preferences of a subscriber, who then receives every alert.
+        """
+        if chat_id in self.data:
+            self._unindex(chat_id)
+            self._save_data()
+
+    def recipients(
+        self,
+        subscribers: AbstractSet[int],
+        kind: str,
+        event_type: Optional[str] = None,
+        probability: Optional[float] = None,
+        distance_mly: Optional[float] = None,
+    ) -> Set[int]:
+        """
+        Return the subscribers who want to receive an alert.
+
+        Parameters
+        ----------
+        subscribers : set of int
+            Chat ids of all subscribers.
+        kind : str
+            Kind of the alert, one of `alert_kinds`.
+        event_type : str, optional
+            Most likely type of the event. If unknown, subscribers aren't filtered
+            on event type.
+        probability : float, optional
+            Probability of the most likely event type. If unknown, subscribers
+            aren't filtered on probability.
+        distance_mly : float, optional
+            Distance of the event in millions of light years. If unknown,
+            subscribers aren't filtered on distance.
+
+        Returns
+        -------
+        set of int
+            Chat ids of the recipients.
+        """
+        matching = self._by_kind[kind] & subscribers
+        if event_type is not None:
+            matching &= self._by_type.get(event_type, set())
+        if probability is not None:
+            end = bisect_right(self._min_probability, (probability, math.inf))
+            matching &= {chat_id for _, chat_id in self._min_probability[:end]}
+        if distance_mly is not None:
+            start = bisect_left(self._max_distance, (distance_mly, -math.inf))
+            matching &= self._no_max_distance.union(
+                chat_id for _, chat_id in self._max_distance[start:]
+            )
+
+        return (subscribers - self.data.keys()) | matching
+
+
+def _remove_sorted(items: list, item) -> None:
+    i = bisect_left(items, item)
+    if i < len(items) and items[i] == item:
+        del items[i]
@@ -0,0 +1,97 @@
+import datetime
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class SuperEvent(object):
+    """
+    The fields of a superevent which the bot uses.
+
+    Only the creation time and the info from the VOEvent of the superevent are
+    kept, instead of the whole superevent from the Grace database. The record has
+    no instance dictionary and the event type and instrument names are interned,
+    so every event shares the same string objects.
+
+    Parameters
+    ----------
+    created : datetime.datetime
+        Creation time of the superevent.
+    event_types : dict, optional
+        Probabilities of the event types.
+    most_likely : str, optional
+        Most likely event type.
+    distance_mean_Mly, distance_std_Mly : float, optional
+        Distance and its standard deviation in Mly.
+    instruments_short : iterable of str
+        Abbreviated names of the detectors which measured the event.
+    instruments_long : iterable of str
+        Full names of the detectors which measured the event.
+    """
+
+    __slots__ = (
+        "created",
+        "event_types",
+        "most_likely",
+        "distance_mean_Mly",
+        "distance_std_Mly",
+        "instruments_short",
+        "instruments_long",
+    )
+
+    def __init__(
+        self,
+        created: datetime.datetime,
+        event_types: Optional[Dict[str, float]] = None,
+        most_likely: Optional[str] = None,
+        distance_mean_Mly: Optional[float] = None,
+        distance_std_Mly: Optional[float] = None,
+        instruments_short: Iterable[str] = (),
+        instruments_long: Iterable[str] = (),
+    ):
+        self.created = created
+        self.event_types: Dict[str, float] = {
+            sys.intern(event_type): probability
+            for event_type, probability in (event_types or {}).items()
+        }
+        self.most_likely = None if most_likely is None else sys.intern(most_likely)
+        self.distance_mean_Mly = distance_mean_Mly
+        self.distance_std_Mly = distance_std_Mly
+        self.instruments_short = _intern_all(instruments_short)
+        self.instruments_long = _intern_all(instruments_long)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SuperEvent):
+            return NotImplemented
+
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"SuperEvent({self.to_dict()})"
+
+    def to_dict(self) -> dict:
+        """
+        Return the fields as a dictionary which can be saved as JSON.
+        """
+        info = {name: getattr(self, name) for name in self.__slots__}
+        info["created"] = self.created.isoformat()
+        info["instruments_short"] = list(self.instruments_short)
+        info["instruments_long"] = list(self.instruments_long)
+
+        return info
+
+    @classmethod
+    def from_dict(cls, info: dict) -> "SuperEvent":
+        """
+        Make a record from a dictionary made by `to_dict`.
+
+        Other keys, such as those of a whole superevent from the Grace database,
+        are ignored.
+        """
+        fields = {name: info[name] for name in cls.__slots__ if name in info}
+        fields["created"] = datetime.datetime.fromisoformat(info["created"])
+
+        return cls(**fields)
+
+
+def _intern_all(strings: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(sys.intern(string) for string in strings)
@@ -0,0 +1,86 @@
+import datetime
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import dateutil.parser
+
+
+class SyncState(object):
+    """
+    Holds and saves how far the local events are in sync with the Grace database.
+
+    The state consists of the creation date of the newest superevent which was
+    seen and, per event, the highest VOEvent number `N` which was processed.
+    """
+
+    def __init__(self, fname: str):
+        self.fname = fname
+        self.newest_created: Optional[datetime.datetime] = None
+        self.revisions: Dict[str, int] = {}
+        self._read()
+
+    def _read(self) -> None:
+        try:
+            with open(self.fname, "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logging.warning(f"Ignoring corrupt sync state in {self.fname}")
+            return
+
+        if state.get("newest_created"):
+            self.newest_created = dateutil.parser.parse(state["newest_created"])
+        self.revisions = state.get("revisions", {})
+
+    def to_dict(self) -> dict:
+        """
+        Return a copy of the state, as it is saved.
+        """
+        return {
+            "newest_created": (
+                self.newest_created.isoformat() if self.newest_created else None
+            ),
+            "revisions": dict(self.revisions),
+        }
+
+    def save(self, state: Optional[dict] = None) -> None:
+        """
+        Save the state, or a copy of it which was made earlier with `to_dict`.
+        """
+        if state is None:
+            state = self.to_dict()
+
+        tmp_fname = f"{self.fname}.tmp"
+        with open(tmp_fname, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_fname, self.fname)
+
+    def seen(self, event_id: str, created: datetime.datetime, revision: int) -> None:
+        """
+        Register the creation date and VOEvent revision of an event.
+
+        Parameters
+        ----------
+        event_id : str
+        created : datetime.datetime
+            When the superevent was created.
+        revision : int
+            Highest VOEvent number `N` which was processed.
+
+        Returns
+        -------
+        None
+        """
+        if self.newest_created is None or created > self.newest_created:
+            self.newest_created = created
+        self.revisions[event_id] = revision
+
+    def forget(self, event_id: str) -> None:
+        self.revisions.pop(event_id, None)
+
+    def clear(self) -> None:
+        self.newest_created = None
+        self.revisions = {}
@@ -0,0 +1,16 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def run():
+    """
+    Run coroutines until they are complete, in an event loop of the test.
+
+    The loop isn't set as the current event loop, so closing it after the test
+    doesn't affect other tests.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from aiogram.utils import exceptions
+
+from broadcast import Broadcaster, BroadcastReport
+
+
+def test_broadcast_sends_to_chats_concurrently(run):
+    broadcaster = Broadcaster(max_concurrent=50, messages_per_second=1000)
+    received = []
+
+    async def send_message(chat_id, text):
+        await asyncio.sleep(0.05)
+        received.append((chat_id, text))
+
+    async def deliver(chat_id):
+        await broadcaster.send(chat_id, send_message, "new event")
+
+    start = time.monotonic()
+    report = run(broadcaster.broadcast(range(40), deliver))
+
+    assert time.monotonic() - start < 40 * 0.05 / 4
+    assert sorted(received) == [(chat_id, "new event") for chat_id in range(40)]
+    assert report.delivered == 40
+    assert report.failed == 0
+
+
+def test_send_retries_after_flood_control(run):
+    broadcaster = Broadcaster(chat_interval=0)
+    attempts = []
+
+    async def send_message(chat_id):
+        attempts.append(chat_id)
+        if len(attempts) == 1:
+            raise exceptions.RetryAfter(0)
+        return "ok"
+
+    assert run(broadcaster.send(1, send_message)) == "ok"
+    assert attempts == [1, 1]
+
+
+def test_blocked_chats_are_reported_as_failed(run):
+    broadcaster = Broadcaster(chat_interval=0)
+
+    async def deliver(chat_id):
+        if chat_id == 2:
+            raise exceptions.BotBlocked("Forbidden: bot was blocked by the user")
+
+    report = run(broadcaster.broadcast([1, 2, 3], deliver))
+
+    assert report.delivered == 2
+    assert report.failed == 1
+
+
+def test_messages_to_same_chat_are_spaced(run):
+    broadcaster = Broadcaster(chat_interval=0.1, messages_per_second=1000)
+    send_times = []
+
+    async def send_message(chat_id):
+        send_times.append(time.monotonic())
+
+    async def deliver(chat_id):
+        await broadcaster.send(chat_id, send_message)
+        await broadcaster.send(chat_id, send_message)
+
+    run(broadcaster.broadcast([1], deliver))
+
+    assert send_times[1] - send_times[0] >= 0.09
+
+
+def test_report_percentiles():
+    report = BroadcastReport([float(i) for i in range(1, 101)], failed=0)
+
+    assert report.percentile(50) == 50.5
+    assert report.percentile(99) > 99
+    assert BroadcastReport([], failed=3).percentile(50) == 0.0
@@ -0,0 +1,57 @@
+from unittest.mock import Mock
+
+import pytest
+
+from callbackrouter import CallbackRouter
+
+
+class Recorder(object):
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, *args):
+        self.calls.append(args)
+
+
+def query(data: str) -> Mock:
+    return Mock(data=data, answer=Recorder())
+
+
+def test_dispatch_by_prefix(run):
+    router = CallbackRouter()
+    select_event, turn_page = Recorder(), Recorder()
+    router.register("event", select_event)
+    router.register("page", turn_page)
+
+    event_query, page_query = query("event:S190521r"), query("page:3:8")
+    run(router.dispatch(event_query))
+    run(router.dispatch(page_query))
+
+    assert select_event.calls == [(event_query, "S190521r")]
+    assert turn_page.calls == [(page_query, "3:8")]
+
+
+def test_handles_only_registered_prefixes():
+    router = CallbackRouter()
+    router.register("event", Recorder())
+
+    assert router.handles(query("event:S190521r"))
+    assert not router.handles(query("next"))
+    assert not router.handles(query(None))
+
+
+def test_unknown_prefix_is_answered(run):
+    unknown = query("poll:1")
+    run(CallbackRouter().dispatch(unknown))
+
+    assert unknown.answer.calls == [()]
+
+
+def test_prefix_is_registered_once():
+    router = CallbackRouter()
+    router.register("event", Recorder())
+
+    with pytest.raises(ValueError):
+        router.register("event", Recorder())
+    with pytest.raises(ValueError):
+        router.register("event:old", Recorder())
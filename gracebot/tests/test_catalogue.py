@@ -0,0 +1,78 @@
+import datetime
+
+from catalogue import CatalogueStats
+from superevent import SuperEvent
+from tests.test_gwevents import make_events
+
+created = datetime.datetime(2019, 5, 21, tzinfo=datetime.timezone.utc)
+
+
+def event(most_likely, distance=None, instruments=("H1", "L1")) -> SuperEvent:
+    return SuperEvent(
+        created,
+        most_likely=most_likely,
+        distance_mean_Mly=distance,
+        instruments_short=instruments,
+    )
+
+
+def make_stats() -> CatalogueStats:
+    return CatalogueStats(
+        {
+            "S190521r": event("BBH", 3000),
+            "S190517h": event("BBH", 6000, ("H1", "L1", "V1")),
+            "S190425z": event("BNS", 500, ("L1", "V1")),
+            "S190518bb": event("Terrestrial"),
+        }
+    )
+
+
+def test_counts():
+    stats = make_stats()
+
+    assert stats.total == 4
+    assert stats.event_types["BBH"] == 2
+    assert stats.event_types["NSBH"] == 0
+    assert stats.detector_counts() == {
+        ("H1", "L1"): 2,
+        ("H1", "L1", "V1"): 1,
+        ("L1", "V1"): 1,
+    }
+
+
+def test_distances():
+    stats = make_stats()
+
+    assert stats.distance("BBH") == (2, 4500, 3000, 6000)
+    assert stats.distance("Terrestrial") is None
+
+
+def test_updated_event_replaces_its_aggregates():
+    stats = make_stats()
+    stats.add("S190521r", event("NSBH", 1000))
+
+    assert stats.total == 4
+    assert stats.event_types["BBH"] == 1
+    assert stats.distance("BBH") == (1, 6000, 6000, 6000)
+    assert stats.distance("NSBH") == (1, 1000, 1000, 1000)
+
+
+def test_removed_event():
+    stats = make_stats()
+    stats.remove("S190425z")
+    stats.remove("S190425z")
+
+    assert stats.total == 3
+    assert "BNS" not in stats.event_types
+    assert stats.distance("BNS") is None
+    assert ("L1", "V1") not in stats.detector_counts()
+
+
+def test_published_events_update_stats(tmp_path):
+    events = make_events(tmp_path)
+    events._publish({"S190521r": event("BBH", 3000)})
+    events._publish({"S190517h": event("BNS", 500)})
+    events._publish({}, ["S190521r"])
+
+    assert events.stats.total == 1
+    assert events.stats.event_types == {"BNS": 1}
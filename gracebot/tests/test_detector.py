@@ -1,9 +1,11 @@
+import asyncio
+
 import pytest
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 from unittest import TestCase
 
-from detector import Detector
+from detector import Detector, DetectorStatusBoard
 
 source = "gracebot/tests/data/detector_status.html"
 source2 = "gracebot/tests/data/detector_status2.html"
@@ -149,3 +151,53 @@ class TestWithoutTime(TestCase):
 
     def test_duration(self):
         assert self.detector.status_duration == timedelta(0)
+
+
+def test_board_parses_all_detectors_from_one_page():
+    snapshot = DetectorStatusBoard(source=source2).refresh()
+
+    assert [d.name for d in snapshot.detectors] == ["Hanford", "Livingston", "Virgo"]
+    for detector in snapshot.detectors:
+        expected = Detector(detector.name, source=source2)
+        assert detector.status == expected.status
+        assert detector.status_duration == expected.status_duration
+
+
+def test_board_keeps_running_after_unexpected_errors(run, monkeypatch):
+    class History(object):
+        def record(self, snapshot):
+            raise ValueError("disk full")
+
+    board = DetectorStatusBoard(source=source2, refresh_interval=0, history=History())
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    with pytest.raises(asyncio.CancelledError):
+        run(board.run())
+
+    assert len(sleeps) == 2
+
+
+def test_stale_snapshot_is_refreshed(run):
+    board = DetectorStatusBoard(source=source2, max_age=60)
+    old = board.refresh()._replace(retrieved=datetime.now() - timedelta(minutes=5))
+    board.snapshot = old
+
+    assert board.is_stale(old)
+    snapshot = run(board.get_snapshot())
+    assert snapshot is not old
+    assert not board.is_stale(snapshot)
+
+
+def test_stale_snapshot_is_served_if_refresh_fails(run):
+    board = DetectorStatusBoard(source=source2, max_age=60)
+    old = board.refresh()._replace(retrieved=datetime.now() - timedelta(minutes=5))
+    board.snapshot = old
+    board.source = "gracebot/tests/data/missing.html"
+
+    assert run(board.get_snapshot()) is old
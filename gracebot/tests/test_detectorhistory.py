@@ -0,0 +1,100 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from detector import DetectorStatus, StatusSnapshot
+from detectorhistory import DetectorHistory
+
+t0 = datetime(2019, 5, 21, 12, 0)
+
+
+def minutes(m):
+    return t0 + timedelta(minutes=m)
+
+
+def add_samples(history, name, samples):
+    for m, status in samples:
+        history.add(name, status, minutes(m))
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = DetectorHistory(str(tmp_path / "history.bin"))
+    add_samples(
+        history,
+        "Hanford",
+        [
+            (0, "Observing"),
+            (1, "Observing"),
+            (2, "Observing"),
+            (3, "Down"),
+            (4, "Down"),
+        ],
+    )
+    add_samples(
+        history,
+        "Livingston",
+        [(0, "Down"), (1, "Observing"), (2, "Observing"), (3, "Observing"), (4, "Up")],
+    )
+
+    return history
+
+
+def test_only_state_changes_are_stored(history):
+    assert len(history._runs) == 5
+
+
+def test_duty_cycle(history):
+    assert history.duty_cycle("Hanford", minutes(0), minutes(4)) == 0.75
+    assert history.duty_cycle("Livingston", minutes(0), minutes(4)) == 0.75
+    assert history.duty_cycle("Hanford", minutes(2), minutes(4)) == 0.5
+
+
+def test_duty_cycle_without_data(history):
+    assert math.isnan(history.duty_cycle("Virgo", minutes(0), minutes(4)))
+    assert math.isnan(history.duty_cycle("Hanford", minutes(10), minutes(20)))
+
+
+def test_network_uptime(history):
+    assert history.network_uptime(minutes(0), minutes(4)) == 0.5
+    assert history.network_uptime(minutes(0), minutes(4), min_detectors=1) == 1.0
+
+
+def test_longest_stretch(history):
+    stretch = history.longest_stretch(minutes(0), minutes(4), detectors=["Livingston"])
+
+    assert stretch.start == minutes(1)
+    assert stretch.end == minutes(4)
+
+    network = history.longest_stretch(minutes(0), minutes(4))
+    assert network.duration == timedelta(minutes=2)
+
+
+def test_gap_is_not_counted(tmp_path):
+    history = DetectorHistory(str(tmp_path / "history.bin"), max_gap=120)
+    add_samples(history, "Virgo", [(0, "Science"), (1, "Science"), (10, "Down")])
+    history.add("Virgo", "Down", minutes(11))
+
+    assert history.duty_cycle("Virgo", minutes(0), minutes(11)) == 0.5
+
+
+def test_history_is_loaded_from_disk(history):
+    loaded = DetectorHistory(history.fname)
+    loaded.add("Hanford", "Down", minutes(5))
+
+    assert len(loaded._runs) == 5
+    assert loaded.duty_cycle("Hanford", minutes(0), minutes(5)) == 0.6
+
+
+def test_record_snapshot(tmp_path):
+    history = DetectorHistory(str(tmp_path / "history.bin"))
+    for m in range(3):
+        history.record(
+            StatusSnapshot(
+                minutes(m),
+                (DetectorStatus("Virgo", "Science", "", timedelta(0)),),
+            )
+        )
+
+    assert history.duty_cycle("Virgo", minutes(0), minutes(2)) == 1.0
@@ -0,0 +1,104 @@
+from unittest.mock import Mock, patch
+
+from ligo.gracedb.exceptions import HTTPError
+
+from diskcache import DiskCache
+from voevent import VOEventFromEventId
+
+
+def test_values_are_loaded_from_disk(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put_json("voevent:S190521r-2-Initial.xml", {"GraceID": "S190521r"})
+
+    assert DiskCache(str(tmp_path)).get_json("voevent:S190521r-2-Initial.xml") == {
+        "GraceID": "S190521r"
+    }
+    assert cache.get_json("voevent:S190521r-1-Preliminary.xml") is None
+
+
+def test_least_recently_used_values_are_removed(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=25)
+    cache.put_bytes("a", b"0123456789")
+    cache.put_bytes("b", b"0123456789")
+    cache.get_bytes("a")
+    cache.put_bytes("c", b"0123456789")
+
+    assert cache.get_bytes("a") == b"0123456789"
+    assert cache.get_bytes("b") is None
+    assert cache.get_bytes("c") == b"0123456789"
+    assert DiskCache(str(tmp_path), max_bytes=25).size == 20
+
+
+voevents_S190521r = [
+    {
+        "N": n,
+        "links": {
+            "file": f"https://gracedb.ligo.org/api/superevents/S190521r/files/{fname}"
+        },
+    }
+    for n, fname in [
+        (1, "S190521r-1-Preliminary.xml,0"),
+        (2, "S190521r-2-Initial.xml,0"),
+    ]
+]
+
+
+@patch("voevent.read_distance_header")
+@patch("ligo.gracedb.rest.GraceDb.get")
+@patch("ligo.gracedb.rest.GraceDb.voevents")
+def test_cached_voevent_is_not_downloaded_again(
+    mock_voevents, mock_get, mock_header, tmp_path
+):
+    mock_voevents.return_value = Mock(
+        json=Mock(return_value={"voevents": list(voevents_S190521r)})
+    )
+    mock_get.return_value = "gracebot/tests/data/S190521r-2-Initial.xml"
+    mock_header.return_value = {"DISTMEAN": 1136.13018, "DISTSTD": 279.257795}
+    cache = DiskCache(str(tmp_path))
+
+    voevent = VOEventFromEventId(cache=cache)
+    voevent.get("S190521r")
+    cached_voevent = VOEventFromEventId(cache=cache)
+    cached_voevent.get("S190521r")
+
+    assert mock_get.call_count == 1
+    assert mock_header.call_count == 1
+    assert cached_voevent.p_astro == voevent.p_astro
+    assert cached_voevent.distance == voevent.distance
+    assert cached_voevent.seen_by_short == ["H1", "L1"]
+
+
+@patch("voevent.read_distance_header")
+@patch("ligo.gracedb.rest.GraceDb.get")
+@patch("ligo.gracedb.rest.GraceDb.voevents")
+def test_fallback_voevent_is_cached_under_newest_url(
+    mock_voevents, mock_get, mock_header, tmp_path
+):
+    missing = {
+        "N": 3,
+        "links": {
+            "file": "https://gracedb.ligo.org/api/superevents/S190521r/files/"
+            "S190521r-3-Update.xml,0"
+        },
+    }
+    mock_voevents.return_value = Mock(
+        json=Mock(return_value={"voevents": list(voevents_S190521r) + [missing]})
+    )
+
+    def get(url):
+        if url == missing["links"]["file"]:
+            raise HTTPError(Mock(status=404, reason="Not Found"))
+        return "gracebot/tests/data/S190521r-2-Initial.xml"
+
+    mock_get.side_effect = get
+    mock_header.return_value = {"DISTMEAN": 1136.13018, "DISTSTD": 279.257795}
+    cache = DiskCache(str(tmp_path))
+
+    VOEventFromEventId(cache=cache).get("S190521r")
+    cached_voevent = VOEventFromEventId(cache=cache)
+    cached_voevent.get("S190521r")
+
+    assert mock_get.call_count == 2
+    assert cached_voevent.revision == 3
+    assert cached_voevent.xml_url == voevents_S190521r[1]["links"]["file"]
+    assert cached_voevent.seen_by_short == ["H1", "L1"]
@@ -0,0 +1,95 @@
+import datetime
+
+import numpy as np
+
+from eventtable import EventTable, instrument_mask
+from superevent import SuperEvent
+from tests.test_gwevents import make_events
+
+
+def created(day: int) -> datetime.datetime:
+    return datetime.datetime(2019, 5, day, tzinfo=datetime.timezone.utc)
+
+
+def event(day, p_astro, distance, instruments=("H1", "L1")) -> SuperEvent:
+    return SuperEvent(
+        created(day),
+        event_types=p_astro,
+        distance_mean_Mly=distance,
+        distance_std_Mly=distance / 4,
+        instruments_short=instruments,
+    )
+
+
+def make_table() -> EventTable:
+    return EventTable(
+        {
+            "S190521r": event(21, {"BBH": 0.99, "Terrestrial": 0.01}, 3000),
+            "S190517h": event(17, {"BNS": 0.6, "BBH": 0.4}, 800, ("H1", "L1", "V1")),
+            "S190425z": event(25, {"BNS": 0.99}, 500, ("L1", "V1")),
+            "S190518bb": event(18, {"BNS": 0.7, "Terrestrial": 0.3}, 2000),
+            "S190519bj": SuperEvent(created(19)),
+        }
+    )
+
+
+def test_columns():
+    table = make_table()
+
+    assert len(table) == 5
+    assert table.ids[table.row("S190425z")] == "S190425z"
+    assert table.distance_mean[table.row("S190517h")] == 800
+    assert table.distance_std[table.row("S190517h")] == 200
+    assert np.isnan(table.distance_mean[table.row("S190519bj")])
+    assert table.instruments[table.row("S190425z")] == instrument_mask(["L1", "V1"])
+    assert list(table.most_likely) == [2, 0, 0, 0, -1]
+
+
+def test_query_combines_conditions():
+    table = make_table()
+
+    assert table.query(
+        event_type="BNS",
+        min_probability=0.5,
+        max_distance_mly=1000,
+        instruments=("H1", "L1", "V1"),
+    ) == ["S190517h"]
+    assert table.query(event_type="BNS", min_probability=0.5) == [
+        "S190517h",
+        "S190425z",
+        "S190518bb",
+    ]
+    assert table.query(most_likely="BBH") == ["S190521r"]
+    assert table.query(instruments=["V1"]) == ["S190517h", "S190425z"]
+    assert table.query() == list(table.ids)
+
+
+def test_query_by_creation_time():
+    table = make_table()
+
+    assert table.query(created_after=created(19), created_before=created(25)) == [
+        "S190521r",
+        "S190519bj",
+    ]
+
+
+def test_empty_table():
+    table = EventTable({})
+
+    assert len(table) == 0
+    assert table.query(event_type="BBH", max_distance_mly=1000) == []
+
+
+def test_table_follows_published_events(tmp_path):
+    events = make_events(tmp_path)
+    events._publish({"S190521r": event(21, {"BBH": 0.99}, 3000)})
+    table = events.table
+
+    assert events.table is table
+    assert events.query(event_type="BBH") == ["S190521r"]
+
+    events._publish({"S190425z": event(25, {"BNS": 0.99}, 500)}, ["S190521r"])
+
+    assert events.table is not table
+    assert events.query(event_type="BBH") == []
+    assert events.query(event_type="BNS") == ["S190425z"]
@@ -0,0 +1,41 @@
+from fileidcache import FileIdCache
+
+
+def write_image(path, content: bytes) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+    return str(path)
+
+
+def test_file_id_is_loaded_from_file(tmp_path):
+    image = write_image(tmp_path / "S190521r" / "bayestar.png", b"skymap")
+    cache = FileIdCache(str(tmp_path / "file_ids.json"))
+    cache.add(image, "AgADBAAD")
+
+    assert FileIdCache(str(tmp_path / "file_ids.json")).get(image) == "AgADBAAD"
+
+
+def test_changed_image_has_no_file_id(tmp_path):
+    image = write_image(tmp_path / "S190521r" / "bayestar.png", b"skymap")
+    cache = FileIdCache(str(tmp_path / "file_ids.json"))
+    cache.add(image, "AgADBAAD")
+
+    write_image(tmp_path / "S190521r" / "bayestar.png", b"new skymap")
+
+    assert cache.get(image) is None
+
+
+def test_newer_image_replaces_file_id_of_older_image(tmp_path):
+    cache = FileIdCache(str(tmp_path / "file_ids.json"))
+    old_image = write_image(tmp_path / "S190521r" / "bayestar0.png", b"skymap")
+    other_event = write_image(tmp_path / "S190517h" / "bayestar0.png", b"skymap")
+    cache.add(old_image, "AgADBAAD")
+    cache.add(other_event, "AgADBQAD")
+
+    new_image = write_image(tmp_path / "S190521r" / "LALInference.png", b"skymap")
+    cache.add(new_image, "AgADBgAD")
+
+    assert cache.get(old_image) is None
+    assert cache.get(new_image) == "AgADBgAD"
+    assert cache.get(other_event) == "AgADBQAD"
@@ -0,0 +1,79 @@
+import gzip
+import io
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+import fitsheader
+
+
+def skymap_bytes(compress: bool = False) -> bytes:
+    table = fits.BinTableHDU.from_columns(
+        [fits.Column(name="PROB", format="D", array=np.linspace(0, 1, 3072))]
+    )
+    table.header["DISTMEAN"] = (1136.13018, "Posterior mean distance (Mpc)")
+    table.header["DISTSTD"] = 279.257795
+    table.header["CREATOR"] = "BAYESTAR"
+    hdus = fits.HDUList([fits.PrimaryHDU(), table])
+
+    buffer = io.BytesIO()
+    hdus.writeto(buffer)
+    data = buffer.getvalue()
+
+    return gzip.compress(data) if compress else data
+
+
+def serve(data: bytes, support_ranges: bool = True):
+    requested = []
+
+    def get(url, headers, **kwargs):
+        if not support_ranges:
+            requested.append(len(data))
+            stream = io.BytesIO(data)
+            raw = Mock(read=lambda size, decode_content: stream.read(size))
+            return Mock(status_code=200, raw=raw)
+        start, end = map(int, headers["Range"][len("bytes=") :].split("-"))
+        chunk = data[start : end + 1]
+        requested.append(len(chunk))
+        return Mock(status_code=206, content=chunk)
+
+    return get, requested
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_header_of_first_extension(compress):
+    data = skymap_bytes(compress)
+    get, requested = serve(data)
+
+    with patch("requests.get", side_effect=get):
+        header = fitsheader.read_header("https://gracedb.ligo.org/skymap.fits")
+
+    assert header["DISTMEAN"] == pytest.approx(1136.13018)
+    assert header["DISTSTD"] == pytest.approx(279.257795)
+    assert header["CREATOR"] == "BAYESTAR"
+    assert header["NAXIS2"] == 3072
+    assert sum(requested) < len(data)
+
+
+def test_read_header_without_range_support():
+    get, _ = serve(skymap_bytes(), support_ranges=False)
+    with patch("requests.get", side_effect=get):
+        header = fitsheader.read_header("https://gracedb.ligo.org/skymap.fits", hdu=0)
+
+    assert header["SIMPLE"] is True
+    assert header["NAXIS"] == 0
+
+
+def test_parse_value():
+    assert fitsheader.parse_value(" 'O''Brien '  / comment") == "O'Brien"
+    assert fitsheader.parse_value("   1.5D2 / scientific") == 150.0
+    assert fitsheader.parse_value("                   42") == 42
+    assert fitsheader.parse_value("                    F") is False
+
+
+def test_data_size_is_padded_to_blocks():
+    header = {"NAXIS": 2, "BITPIX": 8, "NAXIS1": 8, "NAXIS2": 3072, "PCOUNT": 0}
+
+    assert fitsheader.data_size(header) == 9 * fitsheader.BLOCK_SIZE
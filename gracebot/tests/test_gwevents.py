@@ -0,0 +1,293 @@
+import asyncio
+import datetime
+import random
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from gwevents import AsyncEvents, Events
+from ratelimiter import HostRateLimiter
+from superevent import SuperEvent
+
+
+def make_events(tmp_path, **kwargs) -> Events:
+    return Events(
+        sync_file=str(tmp_path / "sync.json"),
+        store_file=str(tmp_path / "events.sqlite"),
+        cache_dir=str(tmp_path / "voevents"),
+        image_dir=str(tmp_path / "img"),
+        **kwargs,
+    )
+
+
+def superevent(event_id: str, created: str) -> dict:
+    return {"superevent_id": event_id, "created": created}
+
+
+def slow_voevent(event_id: str) -> Mock:
+    time.sleep(random.uniform(0, 0.02))
+    voevent = Mock(distance=1.0, distance_std=0.5, seen_by_short=["H1"], revision=1)
+    voevent.p_astro = {"BBH": 0.9, "Terrestrial": 0.1}
+    voevent.seen_by_long = ["Hanford"]
+
+    return voevent
+
+
+@patch.object(Events, "_get_voevent", side_effect=slow_voevent)
+@patch("ligo.gracedb.rest.GraceDb.superevents")
+def test_update_all_keeps_order_of_database(mock_superevents, _, tmp_path):
+    events = [
+        superevent(f"S1906{i:02d}a", f"2019-06-{30 - i:02d} 12:00:00 UTC")
+        for i in range(20)
+    ]
+    mock_superevents.return_value = iter(events)
+
+    gw_events = make_events(tmp_path, max_workers=4)
+    gw_events.update_all()
+
+    assert list(gw_events.data) == [f"S1906{i:02d}a" for i in range(20)]
+    assert gw_events.data["S190600a"].most_likely == "BBH"
+    assert gw_events.data["S190600a"].instruments_long == ("Hanford",)
+
+
+@patch.object(Events, "_get_voevent", return_value=None)
+@patch("ligo.gracedb.rest.GraceDb.superevents")
+def test_update_all_keeps_events_without_voevent(mock_superevents, _, tmp_path):
+    mock_superevents.return_value = iter(
+        [superevent("S190601a", "2019-06-01 12:00:00 UTC")]
+    )
+
+    gw_events = make_events(tmp_path)
+    gw_events.update_all()
+
+    assert gw_events.data["S190601a"].distance_mean_Mly is None
+
+
+def voevent_listing(revisions: dict):
+    def voevents(event_id):
+        listing = [
+            {"N": n, "links": {"file": f"{event_id}-{n}"}}
+            for n in range(1, revisions[event_id] + 1)
+        ]
+        return Mock(json=Mock(return_value={"voevents": listing}))
+
+    return voevents
+
+
+def read_xml(voevent, xml):
+    voevent._data = {"GraceID": xml.split("-")[0], "Instruments": "H1,L1", "BBH": 1.0}
+
+
+@patch("voevent.VOEventFromXml.get", autospec=True, side_effect=read_xml)
+@patch("ligo.gracedb.rest.GraceDb.get")
+@patch("ligo.gracedb.rest.GraceDb.voevents")
+@patch("ligo.gracedb.rest.GraceDb.superevents")
+def test_sync_only_enriches_events_with_new_voevents(
+    mock_superevents, mock_voevents, mock_get, mock_xml_get, tmp_path
+):
+    revisions = {"S190602a": 1, "S190601a": 2}
+    mock_get.side_effect = lambda url: url
+    mock_voevents.side_effect = voevent_listing(revisions)
+    mock_superevents.side_effect = lambda **_: iter(
+        [
+            superevent("S190602a", "2019-06-02 12:00:00 UTC"),
+            superevent("S190601a", "2019-06-01 12:00:00 UTC"),
+        ]
+    )
+
+    gw_events = make_events(tmp_path)
+    gw_events.update_all()
+    assert mock_xml_get.call_count == 2
+
+    revisions["S190601a"] = 3
+    gw_events.sync()
+
+    assert mock_xml_get.call_count == 3
+    assert "created: 2019-05-26 .. now" in mock_superevents.call_args[1]["query"]
+    assert make_events(tmp_path).sync_state.revisions == {
+        "S190602a": 1,
+        "S190601a": 3,
+    }
+
+
+@patch.object(Events, "_get_voevent", return_value=None)
+@patch("ligo.gracedb.rest.GraceDb.superevents")
+def test_sync_removes_retracted_events(mock_superevents, _, tmp_path):
+    mock_superevents.return_value = iter(
+        [
+            superevent("S190602a", "2019-06-02 12:00:00 UTC"),
+            superevent("S190601a", "2019-06-01 12:00:00 UTC"),
+        ]
+    )
+    gw_events = make_events(tmp_path)
+    gw_events.update_all()
+    gw_events.sync_state.newest_created = gw_events.data["S190602a"].created
+
+    mock_superevents.return_value = iter(
+        [superevent("S190602a", "2019-06-02 12:00:00 UTC")]
+    )
+    gw_events.sync()
+
+    assert list(gw_events.data) == ["S190602a"]
+
+
+@patch.object(Events, "_get_voevent", side_effect=slow_voevent)
+@patch("ligo.gracedb.rest.GraceDb.superevents")
+def test_sync_keeps_voevent_info_if_voevent_fails(
+    mock_superevents, mock_get_voevent, tmp_path
+):
+    mock_superevents.side_effect = lambda **_: iter(
+        [
+            superevent("S190602a", "2019-06-02 12:00:00 UTC"),
+            superevent("S190601a", "2019-06-01 12:00:00 UTC"),
+        ]
+    )
+    gw_events = make_events(tmp_path)
+    gw_events.update_all()
+    enriched = gw_events.data["S190602a"]
+
+    mock_get_voevent.side_effect = None
+    mock_get_voevent.return_value = None
+    gw_events.sync()
+
+    assert gw_events.data["S190602a"] == enriched
+    assert make_events(tmp_path).data["S190602a"].most_likely == "BBH"
+    assert gw_events.stats.event_types == {"BBH": 2}
+
+
+@patch.object(Events, "_get_voevent", side_effect=slow_voevent)
+@patch("ligo.gracedb.rest.GraceDb.superevents")
+def test_events_are_loaded_from_store(mock_superevents, _, tmp_path):
+    mock_superevents.return_value = iter(
+        [
+            superevent("S190602a", "2019-06-02 12:00:00 UTC"),
+            superevent("S190601a", "2019-06-01 12:00:00 UTC"),
+        ]
+    )
+    gw_events = make_events(tmp_path)
+    gw_events.update_all()
+
+    stored_events = make_events(tmp_path)
+
+    assert stored_events.data == gw_events.data
+    assert list(stored_events.data) == ["S190602a", "S190601a"]
+    assert stored_events.data["S190601a"].created.tzinfo is not None
+
+
+def test_rate_limiter_spaces_requests_to_same_host():
+    limiter = HostRateLimiter(requests_per_second=50)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.wait("https://gracedb.ligo.org/api/superevents/")
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 5 / 50
+
+
+def test_rate_limiter_does_not_delay_other_hosts():
+    limiter = HostRateLimiter(requests_per_second=1)
+    limiter.wait("https://gracedb.ligo.org/api/")
+
+    start = time.monotonic()
+    limiter.wait("https://ldas-jobs.ligo.caltech.edu/")
+
+    assert time.monotonic() - start < 0.5
+
+
+def test_async_events_do_not_block_event_loop(tmp_path):
+    gw_events = make_events(tmp_path)
+    gw_events.update_single = Mock(side_effect=lambda event_id: time.sleep(0.2))
+    async_events = AsyncEvents(gw_events)
+
+    async def count_ticks() -> int:
+        ticks = 0
+        update = asyncio.ensure_future(async_events.update_single("S190601a"))
+        while not update.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+        return ticks
+
+    # The default loop has the periodic updaters of the events, which would contact
+    # the Grace database
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(count_ticks()) > 5
+    finally:
+        loop.close()
+    gw_events.update_single.assert_called_once_with("S190601a")
+
+
+files_S190521r = {
+    "bayestar.png,0": "https://gracedb.ligo.org/api/superevents/S190521r/files/bayestar.png,0",
+    "bayestar.fits.gz,0": "https://gracedb.ligo.org/api/superevents/S190521r/files/bayestar.fits.gz,0",
+}
+
+
+@patch("imagepool.ImagePool.process")
+@patch("ligo.gracedb.rest.GraceDb.files")
+def test_file_list_is_requested_once_until_event_is_updated(
+    mock_files, mock_process, tmp_path
+):
+    mock_files.return_value = Mock(json=Mock(return_value=files_S190521r))
+    gw_events = make_events(tmp_path)
+
+    gw_events.picture("S190521r")
+    gw_events.picture("S190521r")
+    assert mock_files.call_count == 1
+    mock_process.assert_called_with(files_S190521r["bayestar.png,0"])
+
+    gw_events._publish({"S190521r": SuperEvent(datetime.datetime.now())})
+    gw_events.picture("S190521r")
+    assert mock_files.call_count == 2
+
+
+def test_latest_follows_creation_time(tmp_path):
+    events = make_events(tmp_path)
+    created = datetime.datetime(2019, 5, 21, tzinfo=datetime.timezone.utc)
+    events._publish({"S190521r": SuperEvent(created)})
+    events._publish({"S190425z": SuperEvent(created - datetime.timedelta(days=26))})
+
+    assert list(events.latest) == ["S190521r"]
+
+    events._publish({}, ["S190521r"])
+
+    assert list(events.latest) == ["S190425z"]
+
+
+def test_snapshot_is_consistent(tmp_path):
+    events = make_events(tmp_path)
+    created = datetime.datetime(2019, 5, 21, tzinfo=datetime.timezone.utc)
+    events._publish({"S190521r": SuperEvent(created)})
+    version, time_index, data = events.snapshot()
+
+    events._publish({}, ["S190521r"])
+
+    assert time_index.latest() in data
+    assert events.snapshot()[0] == version + 1
+    assert "S190521r" not in events.snapshot()[2]
+
+
+def test_readers_do_not_wait_for_saving(tmp_path):
+    events = make_events(tmp_path)
+    saving = threading.Event()
+    release = threading.Event()
+
+    def slow_save(updated):
+        saving.set()
+        release.wait(5)
+
+    events.store.save = slow_save
+    created = datetime.datetime(2019, 5, 21, tzinfo=datetime.timezone.utc)
+    publisher = threading.Thread(
+        target=events._publish, args=({"S190521r": SuperEvent(created)},)
+    )
+    publisher.start()
+    try:
+        assert saving.wait(5)
+        assert list(events.latest) == ["S190521r"]
+        assert "S190521r" in events.snapshot()[2]
+    finally:
+        release.set()
+        publisher.join()
@@ -0,0 +1,40 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from image import add_whitespace, find_bounding_box, telegram_variant
+
+
+@pytest.mark.parametrize("rows_per_chunk", [1, 7, 256])
+def test_bounding_box_of_non_white_pixels(rows_per_chunk):
+    img = Image.new("RGBA", (100, 60), (255, 255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([20, 10, 30, 15], fill=(0, 0, 0, 255))
+    img.putpixel((70, 40), (255, 254, 255, 255))
+
+    assert find_bounding_box(img, rows_per_chunk) == (20, 10, 70, 40)
+
+
+def test_alpha_channel_is_ignored():
+    img = Image.new("RGBA", (10, 10), (255, 255, 255, 0))
+    img.putpixel((3, 4), (0, 0, 0, 0))
+
+    assert find_bounding_box(img) == (3, 4, 3, 4)
+
+
+def test_white_image_has_no_bounding_box():
+    assert find_bounding_box(Image.new("RGB", (10, 10), "white")) is None
+
+
+def test_add_whitespace():
+    assert add_whitespace([20, 10, 70, 40], 5) == [15, 5, 75, 45]
+
+
+def test_telegram_variant_is_small_and_flat():
+    img = Image.new("RGBA", (3000, 1500), (255, 255, 255, 0))
+    ImageDraw.Draw(img).rectangle([100, 100, 2000, 1000], fill=(0, 0, 255, 255))
+
+    variant = telegram_variant(img, max_size=1280, colors=16)
+
+    assert variant.size == (1280, 640)
+    assert variant.mode == "P"
+    assert variant.convert("RGB").getpixel((0, 0)) == (255, 255, 255)
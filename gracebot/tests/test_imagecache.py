@@ -0,0 +1,106 @@
+from imagecache import ImageCache, file_version, variant_key
+
+files = "https://gracedb.ligo.org/api/superevents/{}/files/{}"
+
+
+def put_image(cache, url, content: bytes) -> str:
+    src = cache.staging_path(url)
+    with open(src, "wb") as f:
+        f.write(content)
+
+    return cache.put_file(url, src)
+
+
+def test_images_are_stored_per_event(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    url = files.format("S190521r", "bayestar.png,0")
+    path = put_image(cache, url, b"skymap")
+
+    assert path == str(tmp_path / "S190521r" / "bayestar0.png")
+    assert ImageCache(str(tmp_path)).get_path(url) == path
+    assert cache.get_path(files.format("S190521r", "bayestar.png,1")) is None
+
+
+def test_newer_version_replaces_older_version(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    old = files.format("S190521r", "bayestar.png,0")
+    other_image = files.format("S190521r", "LALInference.png,0")
+    other_event = files.format("S190517h", "bayestar.png,0")
+    for url in [old, other_image, other_event]:
+        put_image(cache, url, b"skymap")
+
+    new = files.format("S190521r", "bayestar.png,1")
+    put_image(cache, new, b"new skymap")
+
+    assert cache.get_path(old) is None
+    assert not (tmp_path / "S190521r" / "bayestar0.png").exists()
+    assert cache.get_path(new) is not None
+    assert cache.get_path(other_image) is not None
+    assert cache.get_path(other_event) is not None
+    assert cache.size == len(b"new skymap") + 2 * len(b"skymap")
+
+
+def test_variants_are_replaced_with_their_image(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    old = files.format("S190521r", "bayestar.png,0")
+    put_image(cache, old, b"skymap")
+    variant = put_image(cache, variant_key(old, "telegram"), b"small")
+
+    assert variant == str(tmp_path / "S190521r" / "bayestar0.telegram.png")
+    assert cache.get_path(old) is not None
+
+    put_image(cache, files.format("S190521r", "bayestar.png,1"), b"new skymap")
+
+    assert cache.get_path(variant_key(old, "telegram")) is None
+
+
+def test_least_recently_used_images_are_removed(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=25)
+    first, second, third = [
+        files.format(event_id, "bayestar.png,0")
+        for event_id in ["S190521r", "S190517h", "S190701ah"]
+    ]
+    put_image(cache, first, b"0123456789")
+    put_image(cache, second, b"0123456789")
+    cache.get_path(first)
+    put_image(cache, third, b"0123456789")
+
+    assert cache.get_path(first) is not None
+    assert cache.get_path(second) is None
+    assert cache.get_path(third) is not None
+
+
+def test_file_version():
+    assert file_version(files.format("S190521r", "bayestar.png,1")) == (
+        "bayestar.png",
+        1,
+    )
+    assert file_version(files.format("S190521r", "bayestar.png")) == (
+        "bayestar.png",
+        0,
+    )
+
+
+def test_files_outside_the_index_are_removed_on_start_up(tmp_path):
+    cache = ImageCache(str(tmp_path))
+    url = files.format("S190521r", "bayestar.png,0")
+    path = put_image(cache, url, b"skymap")
+    leftovers = [
+        cache.staging_path(url),
+        str(tmp_path / "S190521r" / "tmp123-456-bayestar0.png"),
+        str(tmp_path / "S190517h" / "LALInference.png"),
+    ]
+    (tmp_path / "S190517h").mkdir()
+    for leftover in leftovers:
+        with open(leftover, "wb") as f:
+            f.write(b"leftover")
+
+    cache = ImageCache(str(tmp_path))
+
+    assert cache.get_path(url) == path
+    assert cache.size == len(b"skymap")
+    assert sorted(tmp_path.rglob("*")) == [
+        tmp_path / "S190521r",
+        tmp_path / "S190521r" / "bayestar0.png",
+        tmp_path / "index.json",
+    ]
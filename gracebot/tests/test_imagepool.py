@@ -0,0 +1,75 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from imagecache import ImageCache
+from imagepool import ImagePool
+
+url = "https://gracedb.ligo.org/api/superevents/S190521r/files/bayestar.png,0"
+
+
+def test_concurrent_requests_share_one_job(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_process_image(url, path, border, telegram_path):
+        calls.append(url)
+        started.set()
+        release.wait(5)
+        for fname in [path, telegram_path]:
+            with open(fname, "wb") as f:
+                f.write(b"skymap")
+        return path
+
+    pool = ImagePool(ImageCache(str(tmp_path)), max_pending=2)
+    # Threads instead of processes, so the patched function is used
+    pool._executor = ThreadPoolExecutor(2)
+    with patch("imagepool.process_image", slow_process_image):
+        with ThreadPoolExecutor(4) as requests:
+            first = requests.submit(pool.process, url)
+            started.wait(5)
+            others = [requests.submit(pool.process, url) for _ in range(3)]
+            # Give the other requests time to find the running job
+            time.sleep(0.2)
+            release.set()
+            paths = [first.result()] + [other.result() for other in others]
+
+        assert pool.process(url) == paths[0]
+        original = pool.process(url, variant="")
+
+    assert calls == [url]
+    assert paths == [str(tmp_path / "S190521r" / "bayestar0.telegram.png")] * 4
+    assert original == str(tmp_path / "S190521r" / "bayestar0.png")
+    assert pool._in_flight == {}
+    pool.shutdown()
+
+
+def test_start_launches_workers(tmp_path):
+    pool = ImagePool(ImageCache(str(tmp_path)), max_workers=2)
+    try:
+        pool.start()
+
+        assert len(pool._executor._processes) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_staged_files_are_removed_if_processing_fails(tmp_path):
+    def failing_process_image(url, path, border, telegram_path):
+        with open(path, "wb") as f:
+            f.write(b"skymap")
+        raise OSError("Can't encode the Telegram variant")
+
+    pool = ImagePool(ImageCache(str(tmp_path)))
+    pool._executor = ThreadPoolExecutor(1)
+    with patch("imagepool.process_image", failing_process_image):
+        with pytest.raises(OSError):
+            pool.process(url)
+
+    assert list((tmp_path / "S190521r").iterdir()) == []
+    assert pool._in_flight == {}
+    pool.shutdown()
@@ -0,0 +1,61 @@
+from unittest.mock import Mock
+
+from imageprefetch import ImagePrefetcher
+
+
+async def prefetch(prefetcher, event_id):
+    await prefetcher.prefetch(event_id)
+
+
+def async_picture(results):
+    calls = []
+
+    async def picture(event_id, refresh=False):
+        calls.append((event_id, refresh))
+        result = results[len(calls) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return picture, calls
+
+
+def test_polls_until_lalinference_image_is_found(run):
+    picture, calls = async_picture(
+        [
+            FileNotFoundError(),
+            "gracebot/img/S190521r/bayestar.png",
+            "gracebot/img/S190521r/bayestar.png",
+            "gracebot/img/S190521r/LALInference.png",
+        ]
+    )
+    prefetcher = ImagePrefetcher(Mock(picture=picture), first_delay=0, max_polls=10)
+
+    run(prefetch(prefetcher, "S190521r"))
+
+    assert calls == [("S190521r", True)] * 4
+    assert prefetcher.pictures["S190521r"] == "gracebot/img/S190521r/LALInference.png"
+
+
+def test_stops_after_max_polls(run):
+    picture, calls = async_picture([FileNotFoundError()] * 3)
+    prefetcher = ImagePrefetcher(Mock(picture=picture), first_delay=0, max_polls=2)
+
+    run(prefetch(prefetcher, "S190521r"))
+
+    assert len(calls) == 3
+    assert "S190521r" not in prefetcher.pictures
+
+
+def test_wait_returns_after_first_image(run):
+    picture, calls = async_picture(["gracebot/img/S190521r/bayestar.png"] * 2)
+    prefetcher = ImagePrefetcher(Mock(picture=picture), first_delay=60, max_polls=1)
+
+    async def prefetch_and_wait():
+        task = prefetcher.prefetch("S190521r")
+        await prefetcher.wait("S190521r", timeout=1)
+        task.cancel()
+
+    run(prefetch_and_wait())
+
+    assert prefetcher.pictures["S190521r"] == "gracebot/img/S190521r/bayestar.png"
@@ -0,0 +1,81 @@
+import datetime
+from types import SimpleNamespace
+
+from keyboard import EventPages, parse_page_payload
+from superevent import SuperEvent
+from timeindex import TimeIndex
+
+
+def event(month: int, day: int, most_likely: str) -> SuperEvent:
+    created = datetime.datetime(2019, month, day, tzinfo=datetime.timezone.utc)
+    return SuperEvent(created, most_likely=most_likely)
+
+
+class FakeEvents(SimpleNamespace):
+    def snapshot(self):
+        return self.version, self.time_index, self.data
+
+
+def make_events(n: int, version: int = 1) -> FakeEvents:
+    # Oldest first, to show that the pages don't depend on the order of the data
+    data = {f"S1905{i:02d}a": event(5, i, "BBH") for i in range(1, n + 1)}
+    return FakeEvents(data=data, version=version, time_index=TimeIndex(data))
+
+
+def callbacks(keyboard) -> list:
+    return [button.callback_data for row in keyboard.inline_keyboard for button in row]
+
+
+def test_first_page():
+    pages = EventPages(make_events(10), rows=2, columns=2)
+
+    assert callbacks(pages.page()) == [
+        "event:S190510a",
+        "event:S190509a",
+        "event:S190508a",
+        "event:S190507a",
+        "page:1:4",
+    ]
+
+
+def test_page_buttons_carry_version_and_offset():
+    events = make_events(10)
+    pages = EventPages(events, rows=2, columns=2)
+
+    prefix, _, payload = callbacks(pages.page())[-1].partition(":")
+    version, offset = parse_page_payload(payload)
+    keyboard = pages.page(offset, version)
+
+    assert callbacks(keyboard)[0] == "event:S190506a"
+    assert callbacks(keyboard)[-2:] == ["page:1:8", "page:1:0"]
+
+
+def test_pages_are_shared():
+    pages = EventPages(make_events(10), rows=2, columns=2)
+
+    assert pages.page(4, 1) is pages.page(4, 1)
+
+
+def test_old_version_keeps_its_events():
+    events = make_events(10)
+    pages = EventPages(events, rows=2, columns=2)
+    pages.page()
+
+    new_event = {"S190600a": event(6, 1, "BNS")}
+    events.data = {**events.data, **new_event}
+    events.time_index = events.time_index.updated(new_event)
+    events.version = 2
+
+    assert callbacks(pages.page(0, 1))[0] == "event:S190510a"
+    assert callbacks(pages.page(0, 2))[0] == "event:S190600a"
+    assert callbacks(pages.page(0))[0] == "event:S190600a"
+
+
+def test_unknown_version_uses_current_events():
+    pages = EventPages(make_events(3, version=5), rows=2, columns=2)
+
+    assert callbacks(pages.page(0, 1)) == [
+        "event:S190503a",
+        "event:S190502a",
+        "event:S190501a",
+    ]
@@ -13,7 +13,9 @@ def int_set():
     yield p_int_set
 
     # Run after tests have finished
+    p_int_set.close()
     os.remove(test_filename)
+    os.remove(f"{test_filename}.journal")
 
 
 def test_add_int(int_set):
@@ -61,7 +63,9 @@ def string_set():
     yield p_string_set
 
     # Run after tests have finished
+    p_string_set.close()
     os.remove(test_filename)
+    os.remove(f"{test_filename}.journal")
 
 
 def test_add_first_string(string_set):
@@ -87,3 +91,42 @@ def test_add_third_string(string_set):
     string_set.add("1234")
     assert len(string_set.data) == 3
     assert string_set.data == {"foo", "bar", "1234"}
+
+
+def test_changes_are_appended_to_journal(tmp_path):
+    fname = str(tmp_path / "subscribers.txt")
+    subscribers = PermanentSet(fname, int)
+    subscribers.add(34)
+    subscribers.add(123)
+    subscribers.remove(34)
+
+    with open(fname) as f:
+        assert f.read() == ""
+    with open(f"{fname}.journal") as f:
+        assert f.read() == "+34\n+123\n-34\n"
+    assert PermanentSet(fname, int).data == {123}
+
+
+def test_incomplete_journal_record_is_ignored(tmp_path):
+    fname = str(tmp_path / "subscribers.txt")
+    with open(fname, "w") as f:
+        f.write("34\n123")
+    with open(f"{fname}.journal", "w") as f:
+        f.write("-34\n+29\n+7")
+
+    assert PermanentSet(fname, int).data == {123, 29}
+
+
+def test_journal_is_compacted(tmp_path):
+    fname = str(tmp_path / "subscribers.txt")
+    subscribers = PermanentSet(fname, int, compact_after=3)
+    for number in range(5):
+        subscribers.add(number)
+        subscribers.remove(number)
+
+    with open(f"{fname}.journal") as f:
+        assert len(f.readlines()) <= 3
+    assert PermanentSet(fname, int).data == set()
+
+    subscribers.add(7)
+    assert PermanentSet(fname, int).data == {7}
@@ -0,0 +1,83 @@
+import math
+
+import pytest
+
+from subscriberprefs import Preferences, SubscriberPreferences
+
+subscribers = {1, 2, 3, 4}
+
+
+def make_preferences(tmp_path) -> SubscriberPreferences:
+    preferences = SubscriberPreferences(str(tmp_path / "preferences.json"))
+    preferences.set(1, Preferences(event_types=frozenset({"BNS", "NSBH"})))
+    preferences.set(2, Preferences(min_probability=0.9, max_distance_mly=1000))
+    preferences.set(3, Preferences(alert_kinds=frozenset({"preliminary"})))
+
+    return preferences
+
+
+def test_subscribers_without_preferences_receive_everything(tmp_path):
+    preferences = make_preferences(tmp_path)
+
+    assert 4 in preferences.recipients(subscribers, "retraction", "Terrestrial", 1.0)
+
+
+def test_recipients_are_filtered_on_event_type(tmp_path):
+    preferences = make_preferences(tmp_path)
+
+    assert preferences.recipients(subscribers, "preliminary", "BBH") == {2, 3, 4}
+    assert preferences.recipients(subscribers, "preliminary", "BNS") == subscribers
+
+
+def test_recipients_are_filtered_on_probability_and_distance(tmp_path):
+    preferences = make_preferences(tmp_path)
+
+    assert preferences.recipients(
+        subscribers, "update", "BBH", probability=0.95, distance_mly=800
+    ) == {2, 4}
+    assert preferences.recipients(
+        subscribers, "update", "BBH", probability=0.8, distance_mly=800
+    ) == {4}
+    assert preferences.recipients(
+        subscribers, "update", "BBH", probability=0.95, distance_mly=2000
+    ) == {4}
+
+
+def test_unknown_event_properties_are_not_filtered(tmp_path):
+    preferences = make_preferences(tmp_path)
+
+    assert preferences.recipients(subscribers, "update") == {1, 2, 4}
+
+
+def test_preferences_are_loaded_from_file(tmp_path):
+    preferences = make_preferences(tmp_path)
+    loaded = SubscriberPreferences(preferences.fname)
+
+    assert loaded.data == preferences.data
+    assert loaded.recipients(subscribers, "update", "BBH", 0.95, 800) == {2, 4}
+
+
+def test_changed_preferences_are_reindexed(tmp_path):
+    preferences = make_preferences(tmp_path)
+    preferences.set(1, Preferences(event_types=frozenset({"BBH"})))
+    preferences.remove(2)
+    preferences.set(3, Preferences())
+
+    assert preferences.recipients(subscribers, "update", "BNS", 0.5, 5000) == {2, 3, 4}
+    assert preferences.data.keys() == {1}
+
+
+@pytest.mark.parametrize(
+    "prefs",
+    [
+        Preferences(min_probability=math.nan),
+        Preferences(max_distance_mly=math.nan),
+        Preferences(max_distance_mly=-1.0),
+    ],
+)
+def test_invalid_thresholds_are_rejected(tmp_path, prefs):
+    preferences = make_preferences(tmp_path)
+
+    with pytest.raises(ValueError):
+        preferences.set(4, prefs)
+    assert 4 not in preferences.data
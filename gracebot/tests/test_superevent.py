@@ -0,0 +1,70 @@
+import datetime
+import json
+
+import pytest
+
+from superevent import SuperEvent
+
+created = datetime.datetime(2019, 5, 21, 7, 50, 19, tzinfo=datetime.timezone.utc)
+
+
+def make_event() -> SuperEvent:
+    return SuperEvent(
+        created,
+        event_types={"BBH": 0.97, "Terrestrial": 0.03},
+        most_likely="BBH",
+        distance_mean_Mly=3000.0,
+        distance_std_Mly=900.0,
+        instruments_short=["H1", "L1"],
+        instruments_long=["Hanford", "Livingston"],
+    )
+
+
+def test_record_has_no_instance_dict():
+    event = make_event()
+
+    with pytest.raises(AttributeError):
+        event.labels = ["EM_READY"]
+
+
+def test_strings_are_interned():
+    first = make_event()
+    # Strings which are made at run time, as when they are parsed from JSON
+    second = SuperEvent(
+        created,
+        event_types={"".join(["B", "BH"]): 0.97},
+        most_likely="".join(["B", "BH"]),
+        instruments_short=["".join(["H", "1"])],
+    )
+
+    assert second.most_likely is first.most_likely
+    assert next(iter(second.event_types)) is next(iter(first.event_types))
+    assert second.instruments_short[0] is first.instruments_short[0]
+
+
+def test_json_round_trip():
+    event = make_event()
+    loaded = SuperEvent.from_dict(json.loads(json.dumps(event.to_dict())))
+
+    assert loaded == event
+    assert loaded.created == created
+    assert loaded.instruments_long == ("Hanford", "Livingston")
+
+
+def test_whole_superevent_is_reduced_to_record():
+    stored = {
+        "superevent_id": "S190521r",
+        "created": created.isoformat(),
+        "labels": ["PE_READY", "ADVOK"],
+        "links": {"logs": "https://gracedb.ligo.org/api/superevents/S190521r/logs/"},
+        "gw_events": ["G333631", "G333632"],
+        "most_likely": "BBH",
+        "event_types": {"BBH": 0.97},
+    }
+
+    event = SuperEvent.from_dict(stored)
+
+    assert event.most_likely == "BBH"
+    assert event.distance_mean_Mly is None
+    assert event.instruments_short == ()
+    assert "labels" not in event.to_dict()
@@ -0,0 +1,59 @@
+import datetime
+
+from superevent import SuperEvent
+from timeindex import TimeIndex
+
+
+def created(day: int) -> datetime.datetime:
+    return datetime.datetime(2019, 5, day, tzinfo=datetime.timezone.utc)
+
+
+def make_index() -> TimeIndex:
+    return TimeIndex(
+        {
+            "S190517h": SuperEvent(created(17)),
+            "S190521r": SuperEvent(created(21)),
+            "S190425z": SuperEvent(created(25)),
+            "S190518bb": SuperEvent(created(18)),
+        }
+    )
+
+
+def test_latest_and_newest():
+    index = make_index()
+
+    assert index.latest() == "S190425z"
+    assert index.newest(2) == ["S190425z", "S190521r"]
+    assert index.newest(2, offset=2) == ["S190518bb", "S190517h"]
+    assert index.newest(10, offset=3) == ["S190517h"]
+    assert index.newest(2, offset=10) == []
+
+
+def test_between():
+    index = make_index()
+
+    assert index.between(created(18), created(25)) == ["S190521r", "S190518bb"]
+    assert index.between(start=created(21)) == ["S190425z", "S190521r"]
+    assert index.between(end=created(18)) == ["S190517h"]
+
+
+def test_updated_returns_new_index():
+    index = make_index()
+    updated = index.updated(
+        {"S190517h": SuperEvent(created(30)), "S190601a": SuperEvent(created(1))},
+        removed=["S190425z", "S190000x"],
+    )
+
+    assert updated.newest(10) == ["S190517h", "S190521r", "S190518bb", "S190601a"]
+    assert "S190425z" not in updated
+    assert len(updated) == 4
+    assert index.latest() == "S190425z"
+    assert len(index) == 4
+
+
+def test_empty_index():
+    index = TimeIndex()
+
+    assert index.latest() is None
+    assert index.newest(5) == []
+    assert index.between(created(1), created(31)) == []
@@ -0,0 +1,44 @@
+import pytest
+
+from gracebot import update_preferences
+from subscriberprefs import Preferences
+
+
+def test_event_types():
+    prefs = update_preferences(Preferences(), ["types", "bbh", "MassGap"])
+
+    assert prefs.event_types == {"BBH", "MassGap"}
+
+
+def test_probability_and_distance():
+    prefs = update_preferences(Preferences(), ["probability", "50%"])
+    prefs = update_preferences(prefs, ["distance", "3000"])
+
+    assert prefs.min_probability == 0.5
+    assert prefs.max_distance_mly == 3000
+    assert update_preferences(prefs, ["distance", "any"]).max_distance_mly is None
+
+
+def test_reset():
+    prefs = update_preferences(Preferences(), ["alerts", "preliminary"])
+
+    assert prefs.alert_kinds == {"preliminary"}
+    assert update_preferences(prefs, ["reset"]) == Preferences()
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["types", "neutron"],
+        ["alerts", "early"],
+        ["probability", "150"],
+        ["probability", "nan"],
+        ["distance", "-5"],
+        ["distance", "nan"],
+        ["distance", "inf"],
+        ["colour"],
+    ],
+)
+def test_invalid_arguments(args):
+    with pytest.raises(ValueError):
+        update_preferences(Preferences(), args)
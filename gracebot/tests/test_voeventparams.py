@@ -0,0 +1,39 @@
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pytest
+
+from voeventparams import parse_params, used_params
+
+test_data = Path("gracebot/tests/data/")
+voevent_files = sorted(test_data.glob("*.xml"))
+
+
+def params_from_tree(filename) -> dict:
+    root = ElementTree.parse(filename).getroot()
+    return {
+        elem.attrib["name"]: elem.attrib["value"] for elem in root.iterfind(".//Param")
+    }
+
+
+@pytest.mark.parametrize("filename", voevent_files, ids=lambda f: f.name)
+def test_all_params_are_parsed(filename):
+    assert parse_params(str(filename)) == params_from_tree(filename)
+
+
+@pytest.mark.parametrize("filename", voevent_files, ids=lambda f: f.name)
+def test_only_requested_params_are_parsed(filename):
+    expected = {
+        name: value
+        for name, value in params_from_tree(filename).items()
+        if name in used_params
+    }
+
+    assert parse_params(filename.read_bytes(), used_params) == expected
+
+
+def test_params_of_retraction():
+    params = parse_params(str(test_data / "MS181101ab-4-Retraction.xml"))
+
+    assert params["AlertType"] == "Retraction"
+    assert params["GraceID"] == "S190521r"
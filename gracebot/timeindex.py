@@ -0,0 +1,130 @@
+import datetime
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from superevent import SuperEvent
+
+
+class TimeIndex(object):
+    """
+    Event ids sorted by their creation time.
+
+    The index doesn't change after it is made. `updated` returns a new index with
+    new, changed and removed events, so an index can be swapped in together with
+    the events it was made from, like `Events.data`. Each event is placed with a
+    binary search, so keeping the index up to date doesn't depend on the order in
+    which the Grace database returns the events.
+
+    Parameters
+    ----------
+    events : dict, optional
+        Events with the event ids as keys.
+    """
+
+    def __init__(self, events: Optional[Mapping[str, SuperEvent]] = None):
+        events = events or {}
+        # (created, event id) pairs, oldest first
+        self._entries: List[Tuple[datetime.datetime, str]] = sorted(
+            (event.created, event_id) for event_id, event in events.items()
+        )
+        self._created: Dict[str, datetime.datetime] = {
+            event_id: created for created, event_id in self._entries
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._created
+
+    def updated(
+        self, events: Mapping[str, SuperEvent], removed: Iterable[str] = ()
+    ) -> "TimeIndex":
+        """
+        Return a new index with the given events added, moved or removed.
+
+        Parameters
+        ----------
+        events : dict
+            New or updated events.
+        removed : iterable of str
+            Ids of the events to remove.
+
+        Returns
+        -------
+        TimeIndex
+        """
+        index = TimeIndex()
+        index._entries = list(self._entries)
+        index._created = dict(self._created)
+        for event_id in removed:
+            index._remove(event_id)
+        for event_id, event in events.items():
+            index._remove(event_id)
+            insort(index._entries, (event.created, event_id))
+            index._created[event_id] = event.created
+
+        return index
+
+    def _remove(self, event_id: str) -> None:
+        created = self._created.pop(event_id, None)
+        if created is None:
+            return
+
+        i = bisect_left(self._entries, (created, event_id))
+        del self._entries[i]
+
+    def latest(self) -> Optional[str]:
+        """
+        Return the id of the most recently created event, or None if there are none.
+        """
+        if not self._entries:
+            return None
+
+        return self._entries[-1][1]
+
+    def newest(self, count: int, offset: int = 0) -> List[str]:
+        """
+        Return the ids of the newest events, newest first.
+
+        Parameters
+        ----------
+        count : int
+            Maximum number of events.
+        offset : int
+            Number of newer events to skip.
+
+        Returns
+        -------
+        list of str
+        """
+        end = max(len(self._entries) - offset, 0)
+        start = max(end - count, 0)
+
+        return [event_id for _, event_id in reversed(self._entries[start:end])]
+
+    def between(
+        self,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[str]:
+        """
+        Return the ids of the events created in a time window, newest first.
+
+        Parameters
+        ----------
+        start : datetime.datetime, optional
+            Start of the window, inclusive. Unbounded by default.
+        end : datetime.datetime, optional
+            End of the window, exclusive. Unbounded by default.
+
+        Returns
+        -------
+        list of str
+        """
+        first = 0 if start is None else bisect_left(self._entries, (start, ""))
+        last = (
+            len(self._entries) if end is None else bisect_left(self._entries, (end, ""))
+        )
+
+        return [event_id for _, event_id in reversed(self._entries[first:last])]
@@ -0,0 +1,56 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache(object):
+    """
+    Least recently used cache whose entries expire after a fixed time.
+
+    Can be shared between threads.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of entries. When full, the least recently used entry is
+        removed.
+    ttl : float
+        Seconds after which an entry expires.
+    """
+
+    def __init__(self, max_size: int = 128, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return default
+
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            _, value = self._data.pop(key, (None, None))
+
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,22 +1,29 @@
 import logging
-from typing import Dict, List, Any
-from xml.etree import ElementTree
+import zlib
+from typing import Dict, List, Any, Optional
 
 from astropy.io import fits
 from ligo.gracedb.exceptions import HTTPError
-from ligo.gracedb.rest import GraceDb
+from ligo.gracedb.rest import GraceDb, DEFAULT_SERVICE_URL
+from requests import RequestException
 
+import fitsheader
+from diskcache import DiskCache
 from logconfig import logging_kwargs
 from functions import mpc_to_mly
+from ratelimiter import HostRateLimiter
+from voeventparams import parse_params, used_params
 
 logging.basicConfig(**logging_kwargs)  # type: ignore
 
 
 class VOEvent(object):
-    def __init__(self):
-        self._data = {}
-        self.distance = 0
-        self.distance_std = 0
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None):
+        self._data: Dict[str, Any] = {}
+        self._distance_header: Dict[str, float] = {}
+        self.distance = 0.0
+        self.distance_std = 0.0
+        self._rate_limiter = rate_limiter
 
     @property
     def id(self) -> str:
@@ -56,11 +63,22 @@ class VOEvent(object):
 
         return p_astro
 
+    def _wait_for_host(self, url: str) -> None:
+        if self._rate_limiter is not None:
+            self._rate_limiter.wait(url)
+
     def _add_distance(self, url: str):
+        self._wait_for_host(url)
+        header = read_distance_header(url)
+        self._distance_header = {
+            key: header[key] for key in ("DISTMEAN", "DISTSTD") if key in header
+        }
+        self._set_distance(url)
+
+    def _set_distance(self, url: str):
         try:
-            with fits.open(url) as fit_data:
-                self.distance = mpc_to_mly(fit_data[1].header["DISTMEAN"])
-                self.distance_std = mpc_to_mly(fit_data[1].header["DISTSTD"])
+            self.distance = mpc_to_mly(self._distance_header["DISTMEAN"])
+            self.distance_std = mpc_to_mly(self._distance_header["DISTSTD"])
         except KeyError as e:
             logging.warning(
                 f"Couldn't get the distance from event url {url}.\n" + f"Exception: {e}"
@@ -68,36 +86,143 @@ class VOEvent(object):
             pass
 
 
+def read_distance_header(url: str) -> dict:
+    """
+    Return the header of the first extension of a skymap, which has the distance.
+
+    Remote skymaps are read with range requests, such that only the headers are
+    downloaded. If that fails, the whole skymap is downloaded instead.
+
+    Parameters
+    ----------
+    url : str
+        URL or local path of the skymap FITS file.
+
+    Returns
+    -------
+    dict
+        Keys are the keywords and the values their values.
+    """
+    if url.split(":")[0] in ("http", "https"):
+        try:
+            return fitsheader.read_header(url, hdu=1)
+        except (fitsheader.FitsHeaderError, RequestException, zlib.error) as e:
+            logging.warning(
+                f"Failed to read only the header of {url}, downloading the whole file."
+                f" Exception: {e}"
+            )
+
+    with fits.open(url) as fit_data:
+        return dict(fit_data[1].header)
+
+
 class VOEventFromXml(VOEvent):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None):
+        super().__init__(rate_limiter)
 
     def get(self, xml_filename: str) -> None:
-        root = ElementTree.parse(xml_filename).getroot()
-        self._data = self._xml_to_dict(root)
+        self._data = parse_params(xml_filename, used_params)
         self._add_distance(self._data["skymap_fits"])
 
-    def _xml_to_dict(self, root: ElementTree.Element) -> Dict[str, str]:
-        return {
-            elem.attrib["name"]: elem.attrib["value"]
-            for elem in root.iterfind(".//Param")
-        }
-
 
 class VOEventFromEventId(VOEventFromXml):
-    def __init__(self):
+    """
+    Gets the newest VOEvent of an event from the Grace database.
+
+    Published VOEvent files don't change. If a cache is given, the Params and the
+    skymap distance of every VOEvent which is read are stored in it under the url
+    of the VOEvent file, and under the url of the newest listed VOEvent if that
+    file was missing. A VOEvent which is in the cache isn't downloaded again.
+    """
+
+    def __init__(
+        self,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        cache: Optional[DiskCache] = None,
+    ):
         self._client = GraceDb()
+        self._cache = cache
         self.event_id = ""
-        super().__init__()
+        self.revision = 0
+        self.xml_url = ""
+        super().__init__(rate_limiter)
+
+    def get(self, event_id: str) -> None:
+        """
+        Get the newest VOEvent of an event.
+
+        Parameters
+        ----------
+        event_id : str
+            The event to get the VOEvent of.
+        """
+        self.get_newer(event_id, known_revision=0)
 
-    def get(self, event_id: str):
+    def get_newer(self, event_id: str, known_revision: int) -> bool:
+        """
+        Get the newest VOEvent of an event, if it is newer than a known revision.
+
+        Parameters
+        ----------
+        event_id : str
+            The event to get the VOEvent of.
+        known_revision : int
+            Highest VOEvent number `N` which was already processed. If no newer
+            VOEvent exists, nothing is downloaded.
+
+        Returns
+        -------
+        bool
+            True if a VOEvent newer than `known_revision` was read.
+        """
         self.event_id = event_id
         voevents = self._get_voevents_json(event_id)
         voevents = self._sort_voevents_newest_first(voevents)
+        self.revision = voevents[0]["N"] if voevents else 0
+        if self.revision <= known_revision:
+            return False
+
+        newest_url = voevents[0]["links"]["file"]
+        if self._get_from_cache(newest_url):
+            return True
+
         xml = self._try_get_latest_voevent(voevents)
         super().get(xml)
+        # If the newest file is missing, an older VOEvent was read. It is also
+        # cached under the newest url, so it isn't downloaded again.
+        self._save_to_cache(newest_url)
+
+        return True
+
+    def _get_from_cache(self, url: str) -> bool:
+        if self._cache is None:
+            return False
+
+        cached = self._cache.get_json(f"voevent:{url}")
+        if cached is None:
+            return False
+
+        self.xml_url = cached.get("xml_url", url)
+        self._data = cached["params"]
+        self._distance_header = cached["distance_header"]
+        self._set_distance(self._data.get("skymap_fits", ""))
+
+        return True
+
+    def _save_to_cache(self, newest_url: str) -> None:
+        if self._cache is None or len(self.xml_url) == 0:
+            return
+
+        cached = {
+            "params": self._data,
+            "distance_header": self._distance_header,
+            "xml_url": self.xml_url,
+        }
+        for url in {self.xml_url, newest_url}:
+            self._cache.put_json(f"voevent:{url}", cached)
 
     def _get_voevents_json(self, event_id: str) -> List[Dict]:
+        self._wait_for_host(DEFAULT_SERVICE_URL)
         response = self._client.voevents(event_id)
         json_voevents = response.json()["voevents"]
 
@@ -114,8 +239,10 @@ class VOEventFromEventId(VOEventFromXml):
         # over all until a existing file is found.
         for voevent in voevents:
             url = voevent["links"]["file"]
+            self._wait_for_host(url)
             try:
                 xml = self._client.get(url)
+                self.xml_url = url
                 return xml
             except HTTPError:
                 if voevent["N"] == 1:
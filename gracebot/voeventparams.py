@@ -0,0 +1,77 @@
+from typing import Any, Dict, Iterable, Optional
+from xml.parsers import expat
+
+# Params which are used by the bot
+used_params = (
+    "GraceID",
+    "AlertType",
+    "BNS",
+    "NSBH",
+    "BBH",
+    "MassGap",
+    "Terrestrial",
+    "Instruments",
+    "skymap_fits",
+)
+
+
+class _AllParamsFound(Exception):
+    pass
+
+
+def parse_params(source: Any, names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Get the name and value of the Param elements of a VOEvent in a single pass.
+
+    The XML is streamed through an expat parser, which only looks at the
+    attributes of the Param elements. No document tree or element objects are
+    built. If `names` is given, only those Params are returned and parsing stops
+    when all of them are found.
+
+    Parameters
+    ----------
+    source : str, bytes or file object
+        Filename, XML or file object of the VOEvent. Objects with a `content`
+        attribute, such as HTTP responses, are read from their content.
+    names : iterable of str, optional
+        Names of the Params to get. By default all Params are returned.
+
+    Returns
+    -------
+    dict
+        Keys are the names of the Params and the values their values.
+    """
+    if hasattr(source, "content") and not hasattr(source, "read"):
+        source = source.content
+
+    wanted = set(names) if names is not None else None
+    params: Dict[str, str] = {}
+
+    def start_element(tag: str, attrs: Dict[str, str]) -> None:
+        if tag != "Param" and not tag.endswith(":Param"):
+            return
+
+        name = attrs.get("name")
+        if name is not None and (wanted is None or name in wanted):
+            params[name] = attrs.get("value", "")
+            if wanted is not None and len(params) == len(wanted):
+                raise _AllParamsFound
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    try:
+        if isinstance(source, (bytes, bytearray, str)) and not _is_filename(source):
+            parser.Parse(source, True)
+        elif hasattr(source, "read"):
+            parser.ParseFile(source)
+        else:
+            with open(source, "rb") as f:
+                parser.ParseFile(f)
+    except _AllParamsFound:
+        pass
+
+    return params
+
+
+def _is_filename(source: Any) -> bool:
+    return isinstance(source, str) and not source.lstrip().startswith("<")